@@ -0,0 +1,141 @@
+"""Cleans many CSV/Excel files from the command line, without the web server.
+
+Run from the `back/` directory:
+
+    python batch_clean.py "exports/*.csv" --config clean.json --output-dir cleaned
+    python batch_clean.py exports/ more/*.xlsx --config clean.json --workers 8
+
+The config is a JSON object with the same options as the `/clean` endpoint. Files are cleaned in
+parallel worker processes; CSVs larger than `--stream-threshold-mb` are cleaned in chunks by
+StreamingDataCleaner so they never have to fit in memory. For each input the output directory
+gets `<name>_cleaned.csv` and `<name>_report.json` (stats, summary, cleaning log and timing), and
+`batch_summary.json` lists every file. The exit status is 1 if any file failed.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from data_cleaner import ALLOWED_EXTENSIONS, AdvancedDataCleaner, disable_stage_cache
+from utils.serialization import dumps
+from utils.streaming import DEFAULT_CHUNKSIZE, StreamingDataCleaner
+
+DEFAULT_OPTIONS = {'imputationMethod': 'none', 'outlierMethod': 'none', 'removeDuplicates': False}
+
+
+def collect_inputs(paths, recursive=False):
+    """Expands directories and glob patterns into a sorted list of CSV/Excel files."""
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            pattern = os.path.join(path, '**', '*') if recursive else os.path.join(path, '*')
+            matches = glob.glob(pattern, recursive=recursive)
+        else:
+            matches = glob.glob(path, recursive=recursive) or [path]
+        files.update(match for match in matches
+                     if os.path.isfile(match) and match.rsplit('.', 1)[-1].lower() in ALLOWED_EXTENSIONS)
+    return sorted(files)
+
+
+def output_names(files):
+    """Unique output base names: the file stem, suffixed with a counter when stems collide."""
+    names, seen = [], {}
+    for path in files:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        names.append(stem if seen[stem] == 1 else f'{stem}_{seen[stem]}')
+    return names
+
+
+def clean_file(path, name, options, output_dir, stream_threshold, chunksize):
+    """Cleans one file and writes its output and report. Runs in a worker process."""
+    warnings.filterwarnings('ignore')
+    disable_stage_cache() # Each file is cleaned once, so cached stages would only hold memory
+    start = time.perf_counter()
+    output_path = os.path.join(output_dir, f'{name}_cleaned.csv')
+    report_path = os.path.join(output_dir, f'{name}_report.json')
+    streamed = path.lower().endswith('.csv') and os.path.getsize(path) > stream_threshold
+    result = {'file': path, 'output': output_path, 'report': report_path, 'mode': 'streaming' if streamed else 'in-memory'}
+    cleaner = StreamingDataCleaner(chunksize=chunksize) if streamed else AdvancedDataCleaner()
+    try:
+        if not cleaner.load_data(path):
+            raise ValueError(cleaner.cleaning_log[-1]['action'] if cleaner.cleaning_log else 'Failed to load file')
+        if streamed:
+            summary = cleaner.run_cleaning(options, output_path)
+        else:
+            summary = cleaner.run_cleaning(options)
+            cleaner.cleaned_data.to_csv(output_path, index=False)
+        result.update(status='ok', rows_before=cleaner.stats_before['total_rows'], rows_after=cleaner.stats_after['total_rows'])
+    except Exception as e:
+        summary = None
+        result.update(status='failed', error=f'{type(e).__name__}: {e}', traceback=traceback.format_exc())
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    report = {**result, 'options': options, 'summary': summary, 'stats_before': cleaner.stats_before,
+              'stats_after': cleaner.stats_after, 'missing_info': cleaner.missing_info,
+              'outliers_info': cleaner.outliers_info, 'cleaning_log': cleaner.cleaning_log}
+    with open(report_path, 'wb') as f:
+        f.write(dumps(report))
+    result.pop('traceback', None)
+    return result
+
+
+def run(args):
+    files = collect_inputs(args.inputs, args.recursive)
+    if not files:
+        print('No CSV/Excel files matched', file=sys.stderr)
+        return [], 1
+    options = dict(DEFAULT_OPTIONS)
+    if args.config:
+        with open(args.config) as f:
+            options.update(json.load(f))
+    os.makedirs(args.output_dir, exist_ok=True)
+    stream_threshold = args.stream_threshold_mb * 1024 * 1024
+    jobs = [(path, name, options, args.output_dir, stream_threshold, args.chunksize)
+            for path, name in zip(files, output_names(files))]
+
+    results = []
+    def report(result):
+        results.append(result)
+        print(f"{result['status']:<8}{result['seconds']:>10.2f} s  {result['mode']:<10} {result['file']}"
+              + (f"  ({result['error']})" if result['status'] == 'failed' else ''), file=sys.stderr)
+
+    if args.workers == 1 or len(jobs) == 1:
+        for job in jobs:
+            report(clean_file(*job))
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            for future in as_completed([executor.submit(clean_file, *job) for job in jobs]):
+                report(future.result())
+    results.sort(key=lambda result: result['file'])
+    return results, int(any(result['status'] != 'ok' for result in results))
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help='files, directories or glob patterns')
+    parser.add_argument('--config', help='JSON file with /clean options (default: no cleaning steps)')
+    parser.add_argument('--output-dir', default='cleaned')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--recursive', action='store_true', help='search directories and ** patterns recursively')
+    parser.add_argument('--stream-threshold-mb', type=float, default=256, help='stream CSVs larger than this')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='rows per chunk in streaming mode')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results, status = run(args)
+    if results:
+        summary = {'seconds': round(time.perf_counter() - start, 3), 'files': results}
+        with open(os.path.join(args.output_dir, 'batch_summary.json'), 'wb') as f:
+            f.write(dumps(summary))
+        failed = sum(result['status'] != 'ok' for result in results)
+        print(f"{len(results) - failed} cleaned, {failed} failed in {summary['seconds']:.2f} s", file=sys.stderr)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
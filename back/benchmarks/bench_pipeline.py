@@ -0,0 +1,171 @@
+"""Benchmarks each stage of the AdvancedDataCleaner pipeline on synthetic dirty data.
+
+Run from the `back/` directory:
+
+    python -m benchmarks.bench_pipeline --rows 100000 --output results.json
+    python -m benchmarks.bench_pipeline --rows 100000 --baseline results.json
+
+Each stage reports the best wall time over `--repeat` runs and its peak traced memory (measured in
+a separate run, since tracemalloc slows execution). With `--baseline`, stages slower than the
+baseline by more than `--tolerance` are reported and the process exits with status 1.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from data_cleaner import AdvancedDataCleaner, build_report, chart_renderer, stage_cache
+from utils.dataset_store import DatasetStore
+from benchmarks.dirty_data import generate_dirty_data
+
+IMPUTATION_METHODS = ['mean', 'median', 'knn']
+OUTLIER_METHODS = ['iqr', 'zscore', 'winsorization']
+
+
+def measure(setup, fn, repeat):
+    """Returns (best seconds, peak MB) for fn(*setup()); setup time is excluded."""
+    best = float('inf')
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    args = setup()
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1024 ** 2
+
+
+def build_stages(csv_path, store_root):
+    """Returns (name, setup, fn) triples covering every pipeline stage."""
+    loaded = AdvancedDataCleaner()
+    loaded.load_data(csv_path)
+    parsed = loaded._read_file(csv_path)
+    normalized = parsed.copy()
+    loaded._normalize_missing_values(normalized)
+    cleaned = copy.deepcopy(loaded)
+    cleaned.run_cleaning({'imputationMethod': 'median', 'outlierMethod': 'iqr', 'removeDuplicates': True})
+    store = DatasetStore(store_root)
+    AdvancedDataCleaner().load_data(csv_path, dataset_store=store)
+
+    def fresh():
+        stage_cache.clear() # Time the stages themselves, not cache hits from the previous repeat
+        return (copy.deepcopy(loaded),)
+
+    def fresh_report():
+        chart_renderer.clear() # Render the charts on every repeat instead of timing PNG cache hits
+        return (copy.deepcopy(cleaned),)
+
+    def clean_with(imputation='none', outlier='none', dedup=False):
+        options = {'imputationMethod': imputation, 'outlierMethod': outlier, 'removeDuplicates': dedup}
+        return lambda cleaner: cleaner.run_cleaning(options)
+
+    def reanalyze(cleaner):
+        cleaner._profiles = {}
+        cleaner.analyze_data_quality(is_before=True)
+
+    stages = [
+        ('load', lambda: (AdvancedDataCleaner(),), lambda cleaner: cleaner.load_data(csv_path)),
+        ('load[cached]', lambda: (AdvancedDataCleaner(),), lambda cleaner: cleaner.load_data(csv_path, dataset_store=store)),
+        ('parse', lambda: (), lambda: loaded._read_file(csv_path)),
+        ('normalize', lambda: (parsed.copy(),), loaded._normalize_missing_values),
+        ('coerce', lambda: (normalized.copy(),), loaded._coerce_numeric_columns),
+        ('analyze', fresh, reanalyze),
+    ]
+    stages += [(f'impute[{m}]', fresh, clean_with(imputation=m)) for m in IMPUTATION_METHODS]
+    stages += [(f'outliers[{m}]', fresh, clean_with(outlier=m)) for m in OUTLIER_METHODS]
+    stages += [
+        ('dedup', fresh, clean_with(dedup=True)),
+        ('visualization_data', lambda: (cleaned,), lambda cleaner: cleaner.get_visualization_data(cleaner.cleaned_data)),
+        ('pdf_report', fresh_report, build_report),
+    ]
+    return stages
+
+
+def compare(results, baseline, tolerance, min_seconds):
+    """Returns the stages that got slower than the baseline by more than `tolerance`."""
+    regressions = []
+    for name, current in results['stages'].items():
+        previous = baseline.get('stages', {}).get(name)
+        if previous is None:
+            continue
+        slower = current['seconds'] - previous['seconds']
+        if slower > min_seconds and current['seconds'] > previous['seconds'] * (1 + tolerance):
+            regressions.append({'stage': name, 'baseline_seconds': previous['seconds'], 'seconds': current['seconds'],
+                                'ratio': round(current['seconds'] / previous['seconds'], 3)})
+    return regressions
+
+
+def run(args):
+    params = {'rows': args.rows, 'extra_numeric': args.extra_numeric, 'extra_text': args.extra_text,
+              'missing_rate': args.missing_rate, 'outlier_rate': args.outlier_rate,
+              'duplicate_rate': args.duplicate_rate, 'seed': args.seed}
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'bench.csv')
+        generate_dirty_data(**params).to_csv(csv_path, index=False)
+        results = {
+            'meta': {'params': params, 'repeat': args.repeat, 'python': platform.python_version(),
+                     'pandas': pd.__version__, 'numpy': np.__version__, 'machine': platform.machine(),
+                     'cpus': os.cpu_count(), 'file_mb': round(os.path.getsize(csv_path) / 1024 ** 2, 2)},
+            'stages': {}
+        }
+        for name, setup, fn in build_stages(csv_path, os.path.join(tmp, 'datasets')):
+            if any(name.startswith(skip) for skip in args.skip):
+                continue
+            seconds, peak_mb = measure(setup, fn, args.repeat)
+            results['stages'][name] = {'seconds': round(seconds, 6), 'peak_mb': round(peak_mb, 2)}
+            print(f'{name:<24}{seconds:>10.4f} s{peak_mb:>12.1f} MB', file=sys.stderr)
+    return results
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--extra-numeric', type=int, default=0, help='additional numeric columns')
+    parser.add_argument('--extra-text', type=int, default=0, help='additional text columns')
+    parser.add_argument('--missing-rate', type=float, default=0.08)
+    parser.add_argument('--outlier-rate', type=float, default=0.01)
+    parser.add_argument('--duplicate-rate', type=float, default=0.02)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip', nargs='*', default=[], help='stage name prefixes to skip, e.g. pdf_report impute[knn]')
+    parser.add_argument('--output', help='write results JSON here (default: stdout)')
+    parser.add_argument('--baseline', help='results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown ratio before flagging')
+    parser.add_argument('--min-seconds', type=float, default=0.01, help='ignore slowdowns smaller than this')
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    results = run(args)
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            results['regressions'] = compare(results, json.load(f), args.tolerance, args.min_seconds)
+        for regression in results['regressions']:
+            print(f"REGRESSION {regression['stage']}: {regression['baseline_seconds']:.4f}s -> "
+                  f"{regression['seconds']:.4f}s (x{regression['ratio']})", file=sys.stderr)
+        status = 1 if results['regressions'] else 0
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+ITEMS = {'Coffee': 2.0, 'Tea': 1.5, 'Sandwich': 4.0, 'Salad': 5.0, 'Cake': 3.0, 'Cookie': 1.0, 'Smoothie': 4.0, 'Juice': 3.0}
+PAYMENT_METHODS = ['Cash', 'Credit Card', 'Digital Wallet']
+LOCATIONS = ['In-store', 'Takeaway']
+MISSING_TOKENS = ['', 'NA', 'n/a', 'nan', 'NULL', 'None', 'UNKNOWN', 'ERROR']
+
+
+def _inject_tokens(values, rate, rng):
+    """Replaces a fraction of an object array with random missing-value tokens."""
+    mask = rng.random(len(values)) < rate
+    values[mask] = rng.choice(MISSING_TOKENS, mask.sum())
+    return values
+
+
+def generate_dirty_data(rows=10_000, extra_numeric=0, extra_text=0, missing_rate=0.08, outlier_rate=0.01, duplicate_rate=0.02, seed=0):
+    """Generates a dirty sales dataset shaped like DS/dirty_cafe_sales.csv.
+
+    Numeric columns are emitted as text with missing tokens mixed in, so loading exercises both
+    `_normalize_missing_values` and `_coerce_numeric_columns`. `extra_numeric`/`extra_text` add
+    wide-table columns; `outlier_rate` scales numeric values by 10-50x and `duplicate_rate` appends
+    copies of random rows.
+    """
+    rng = np.random.default_rng(seed)
+    items = rng.choice(list(ITEMS), rows)
+    quantity = rng.integers(1, 6, rows).astype(float)
+    price = np.array([ITEMS[item] for item in items])
+    total = quantity * price
+    numeric = {'Quantity': quantity, 'Price Per Unit': price, 'Total Spent': total}
+    for i in range(extra_numeric):
+        numeric[f'Metric {i}'] = np.round(rng.lognormal(3, 0.5, rows), 2)
+
+    data = {'Transaction ID': np.char.add('TXN_', rng.integers(1_000_000, 9_999_999, rows).astype(str)).astype(object)}
+    data['Item'] = _inject_tokens(items.astype(object), missing_rate, rng)
+    for name, values in numeric.items():
+        outliers = rng.random(rows) < outlier_rate
+        values = np.where(outliers, values * rng.uniform(10, 50, rows), values)
+        data[name] = _inject_tokens(values.astype(str).astype(object), missing_rate, rng)
+    data['Payment Method'] = _inject_tokens(rng.choice(PAYMENT_METHODS, rows).astype(object), missing_rate * 3, rng)
+    data['Location'] = _inject_tokens(rng.choice(LOCATIONS, rows).astype(object), missing_rate * 4, rng)
+    dates = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D')
+    data['Transaction Date'] = _inject_tokens(dates.strftime('%Y-%m-%d').to_numpy(dtype=object), missing_rate, rng)
+    for i in range(extra_text):
+        data[f'Note {i}'] = _inject_tokens(rng.choice([f'note_{j}' for j in range(50)], rows).astype(object), missing_rate, rng)
+
+    df = pd.DataFrame(data)
+    n_duplicates = int(rows * duplicate_rate)
+    if n_duplicates:
+        df = pd.concat([df, df.iloc[rng.integers(0, rows, n_duplicates)]], ignore_index=True)
+        df = df.sample(frac=1, random_state=seed).reset_index(drop=True)
+    return df
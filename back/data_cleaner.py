@@ -0,0 +1,467 @@
+"""The cleaning pipeline and PDF report, shared by the web server, its background jobs,
+batch_clean.py and the benchmarks.
+
+Importing this module creates no folders and holds no per-session state: the upload, session,
+dataset and job stores belong to `main`.
+"""
+import copy
+import io
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+
+from utils.session_store import DATA_ATTRS, frame_memory
+from utils.column_profile import DataProfile, hash_rows, numeric_block
+from utils.compaction import CATEGORY_MAX_RATIO, compact_frame
+from utils.capping import CAP_METHODS, cap_block
+from utils.knn_imputation import FastKNNImputer
+from utils.charts import ChartRenderer
+from utils.visualization import build_visualizations
+from utils.preview import outlier_cells, select_rows
+from utils.dedup import FUZZY_THRESHOLD, duplicate_mask
+from utils.metrics import MetricsRegistry, stage_timer
+from utils.stage_cache import StageCache, fingerprint_frame, chain_key
+from utils.type_inference import missing_token_variants, normalize_missing_values, coerce_numeric_columns, infer_schema
+
+# --- Configuration ---
+ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls'}
+STAGE_CACHE_MAX_BYTES = int(os.environ.get('STAGE_CACHE_MAX_MB', 512)) * 1024 * 1024
+COMPACT_DATA = os.environ.get('COMPACT_DATA', '1') == '1' # Categorical/Arrow text and downcast integers after load
+COMPACT_CATEGORY_RATIO = float(os.environ.get('COMPACT_CATEGORY_RATIO', CATEGORY_MAX_RATIO))
+COMPACT_FLOATS = os.environ.get('COMPACT_FLOATS', '0') == '1' # float64 -> float32 where exact; changes imputed values
+CAP_WORKERS = int(os.environ.get('CAP_WORKERS', os.cpu_count() or 1)) # Threads for capping wide tables by column group
+CHART_WORKERS = int(os.environ.get('CHART_WORKERS', os.cpu_count() or 1))
+VIZ_MAX_POINTS = int(os.environ.get('VIZ_MAX_POINTS', 500)) # Points per scatter chart after downsampling
+VIZ_DOWNSAMPLE = os.environ.get('VIZ_DOWNSAMPLE', 'lttb') # 'lttb' or 'minmax'
+
+# --- Main DataCleaner Class ---
+class AdvancedDataCleaner:
+    def __init__(self):
+        self.original_data = None
+        self.cleaned_data = None
+        self.dataset_id = None
+        self.schema = None
+        self.memory_info = {} # Memory before/after dtype compaction at load
+        self.cleaning_log = []
+        self.stats_before = {}
+        self.stats_after = {}
+        self.outliers_info = {}
+        self.missing_info = {}
+        self.missing_tokens = {"", "na", "n/a", "nan", "null", "none", "unknown", "error"}
+        self.timings = [] # Per-stage seconds and memory deltas of the last load or cleaning run
+        self._profiles = {}
+        self._preview_rows = {}
+
+    def __getstate__(self):
+        # Preview orderings are a per-process accelerator; keep them out of pickles and session spills.
+        state = dict(self.__dict__)
+        state.pop('_preview_rows', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._preview_rows = {}
+
+    def job_state(self, frames=(), dataset_store=None):
+        """Snapshot of the cleaner for a background job, holding only the DataFrames in `frames`.
+
+        original_data is left out when the worker can read it from `dataset_store` by dataset_id.
+        Containers are copied shallowly and DataFrames shared, since they are never modified in
+        place; the snapshot is pickled later by the job pool rather than under the session lock.
+        """
+        state = {key: copy.copy(value) for key, value in self.__getstate__().items() if key not in DATA_ATTRS}
+        if 'original_data' in frames and dataset_store is not None and dataset_store.has(self.dataset_id):
+            frames = [attr for attr in frames if attr != 'original_data']
+        state['_profiles'] = {which: profile for which, profile in self._profiles.items() if f'{which}_data' in frames}
+        for attr in frames:
+            state[attr] = getattr(self, attr)
+        return state
+
+    @classmethod
+    def from_job_state(cls, state, dataset_store=None):
+        """Rebuilds a cleaner from `job_state`, reading original_data from the store when it was left out."""
+        cleaner = cls()
+        cleaner.__setstate__(state)
+        if 'original_data' not in state and dataset_store is not None and cleaner.dataset_id is not None:
+            cleaner.original_data = dataset_store.read(cleaner.dataset_id)
+        return cleaner
+
+    def _normalize_missing_values(self, df):
+        """Normalize common missing-value tokens to NaN for object columns. Returns True if anything changed."""
+        return normalize_missing_values(df, self.missing_tokens)
+
+    def _coerce_numeric_columns(self, df, threshold=0.6):
+        """Coerce object columns to numeric when mostly numeric. Returns True if anything changed."""
+        return coerce_numeric_columns(df, threshold)
+
+    def _read_file(self, file_path):
+        """Parses a CSV/Excel file, letting the parser map most missing-value tokens to NaN."""
+        na_values = missing_token_variants(self.missing_tokens)
+        file_extension = file_path.rsplit('.', 1)[1].lower()
+        if file_extension == 'csv':
+            return pd.read_csv(file_path, encoding='utf-8', on_bad_lines='skip', na_values=na_values)
+        return pd.read_excel(file_path, na_values=na_values)
+
+    def get_profile(self, which):
+        """Returns the cached DataProfile of 'original' or 'cleaned' data, computing it on first use."""
+        if which not in self._profiles:
+            df = self.original_data if which == 'original' else self.cleaned_data
+            self._profiles[which] = DataProfile(df)
+        return self._profiles[which]
+
+    def load_data(self, file_path, dataset_store=None):
+        """Loads and performs initial analysis on the dataset.
+
+        With a DatasetStore, the normalized data is cached in columnar form under the file's content
+        hash, and loading identical content again skips parsing entirely.
+        """
+        self.timings = []
+        try:
+            with stage_timer('load', metrics) as load_timing:
+                self.dataset_id = None
+                if dataset_store:
+                    with self._timed('digest'):
+                        self.dataset_id = dataset_store.digest_file(file_path, variant=self._compaction_settings())
+                if dataset_store and dataset_store.has(self.dataset_id):
+                    with self._timed('read_dataset'):
+                        self.original_data = dataset_store.read(self.dataset_id)
+                        # Stored already compacted; keep the figures measured when it was first loaded
+                        self.memory_info = dataset_store.metadata(self.dataset_id).get('memory_info', {})
+                else:
+                    with self._timed('parse'):
+                        self.original_data = self._read_file(file_path)
+                        self.original_data.columns = [str(col).strip() for col in self.original_data.columns]
+                    with self._timed('normalize'):
+                        self._normalize_missing_values(self.original_data)
+                    with self._timed('coerce'):
+                        self._coerce_numeric_columns(self.original_data)
+                    self._compact_original()
+                    if dataset_store:
+                        with self._timed('store_dataset'):
+                            if not dataset_store.put(self.dataset_id, self.original_data, metadata={'memory_info': self.memory_info}):
+                                self.dataset_id = None
+                with self._timed('analyze'):
+                    self.schema = infer_schema(self.original_data)
+                    self.cleaned_data = self.original_data.copy(deep=False) # Stages replace whole columns, so unchanged ones stay shared
+                    self._profiles = {}
+                    self.analyze_data_quality(is_before=True)
+                    self._profiles['cleaned'] = self._profiles['original'] # Identical until cleaning runs
+            self.log_action(f"Data loaded: {len(self.original_data)} rows, {len(self.original_data.columns)} columns", load_timing)
+            return True
+        except Exception as e:
+            self.log_action(f"Error loading data: {str(e)}")
+            return False
+
+    def _compaction_settings(self):
+        """The settings that decide how loaded data is compacted, part of the dataset store key."""
+        return f'compact={int(COMPACT_DATA)},ratio={COMPACT_CATEGORY_RATIO},floats={int(COMPACT_FLOATS)}'
+
+    def _compact_original(self):
+        """Converts the loaded data to compact dtypes and records its memory before and after."""
+        if not COMPACT_DATA:
+            self.memory_info = {}
+            return
+        with self._timed('compact'):
+            self.memory_info = compact_frame(self.original_data, COMPACT_CATEGORY_RATIO, COMPACT_FLOATS)
+
+    def analyze_data_quality(self, is_before=True):
+        """Performs a comprehensive data quality analysis."""
+        df = self.original_data if is_before else self.cleaned_data
+        profile = self.get_profile('original' if is_before else 'cleaned')
+        stats_dict = {
+            'total_rows': profile.n_rows,
+            'total_columns': profile.n_columns,
+            'missing_values': profile.missing_values,
+            'duplicate_rows': profile.duplicate_rows,
+            'health_score': profile.health_score(),
+            'memory_mb': round(frame_memory(df) / 1024 ** 2, 3)
+        }
+        
+        if is_before:
+            if self.memory_info:
+                stats_dict['memory_before_compaction_mb'] = self.memory_info['memory_before_mb']
+            self.stats_before = stats_dict
+            self.missing_info = {col: {'count': int(count)} for col, count in profile.null_counts.items() if count > 0}
+            self.outliers_info = self._detect_outliers_info(df, profile)
+        else:
+            self.stats_after = stats_dict
+
+    def calculate_health_score(self, df, profile=None):
+        """Calculates a health score for the dataset."""
+        return (profile or DataProfile(df)).health_score()
+
+    def _detect_outliers_info(self, df, profile=None):
+        """Helper to detect outlier counts for analysis using MAD."""
+        counts = (profile or DataProfile(df)).numeric['mad_outliers']
+        return {col: {'count': int(count)} for col, count in counts.items() if count > 0}
+        
+    def get_outlier_indices_for_preview(self, df, which='original'):
+        """Identifies the [row, column_name] coordinates of outliers in the first 100 rows, using the dataset-wide MAD bounds."""
+        return outlier_cells(df.head(100), self.get_profile(which))
+
+    def get_preview(self, which='cleaned', offset=0, limit=100, sort=None, descending=False, filter=None, column=None, dataset_store=None):
+        """Returns (window DataFrame, matching row count) for a slice of the original or cleaned data.
+
+        Row orderings for a sort/filter are cached until the data changes, so paging through them only
+        slices. Unsorted, unfiltered windows of the original data are read straight from the
+        memory-mapped dataset store when the upload is in it.
+        """
+        df = self.original_data if which == 'original' else self.cleaned_data
+        if sort is None and filter is None:
+            if which == 'original' and dataset_store is not None and dataset_store.has(self.dataset_id):
+                return dataset_store.read(self.dataset_id, offset=offset, length=limit), len(df)
+            return df.iloc[offset:offset + limit], len(df)
+        profile = self.get_profile(which)
+        key = (which, sort, descending, filter, column)
+        cached = self._preview_rows.get(key)
+        if cached is None or cached[0] is not profile:
+            cached = (profile, select_rows(df, profile, filter=filter, column=column, sort=sort, descending=descending))
+            self._preview_rows[key] = cached
+            while len(self._preview_rows) > 8:
+                self._preview_rows.pop(next(iter(self._preview_rows)))
+        positions = cached[1]
+        return df.iloc[positions[offset:offset + limit]], len(positions)
+
+    def log_action(self, action, timing=None):
+        entry = {'timestamp': datetime.now().isoformat(), 'action': action}
+        if timing is not None:
+            entry['seconds'], entry['memory_delta_mb'] = timing['seconds'], timing['memory_delta_mb']
+        self.cleaning_log.append(entry)
+
+    @contextmanager
+    def _timed(self, stage):
+        """Times one stage of the current operation into `timings` and the stage latency histogram."""
+        with stage_timer(stage, metrics) as timing:
+            yield timing
+        self.timings.append(timing)
+
+    def _impute_stage(self, df, method, knn_search):
+        profile = self.get_profile('original')
+        numeric_cols = profile.numeric_cols
+        if method == 'mean':
+            df = df.copy(deep=False)
+            df[numeric_cols] = df[numeric_cols].fillna(profile.numeric['mean'])
+            return df, ["Applied mean imputation."]
+        elif method == 'median':
+            df = df.copy(deep=False)
+            df[numeric_cols] = df[numeric_cols].fillna(profile.numeric['median'])
+            return df, ["Applied median imputation."]
+        elif method == 'knn':
+            if not df[numeric_cols].empty and profile.null_counts[numeric_cols].sum() > 0:
+                imputer = FastKNNImputer(n_neighbors=5, search=knn_search)
+                imputed_data = imputer.fit_transform(df[numeric_cols].to_numpy(dtype=float, na_value=np.nan))
+                df = df.copy(deep=False)
+                df[numeric_cols] = pd.DataFrame(imputed_data, index=df.index, columns=numeric_cols)
+                messages = [f"Applied KNN imputation ({knn_search} search)."]
+                if imputer.n_mean_fallback_:
+                    messages.append(f"{imputer.n_mean_fallback_} values had no KNN donors and were imputed with the column mean.")
+                return df, messages
+        return None
+
+    def _cap_stage(self, df, method):
+        numeric_cols = self.get_profile('original').numeric_cols
+        if method not in CAP_METHODS:
+            return None
+        df = df.copy(deep=False)
+        block = numeric_block(df, numeric_cols)
+        has_values = ~np.isnan(block).all(axis=0)
+        capped = cap_block(block[:, has_values], method, n_jobs=CAP_WORKERS)
+        for j, col in enumerate(numeric_cols[has_values]):
+            df[col] = capped[:, j]
+        messages = {'iqr': "Capped outliers using the robust MAD method.", 'zscore': "Capped outliers using the Z-Score method.",
+                    'winsorization': "Applied Winsorization to outliers."}
+        return df, [messages[method]]
+
+    def _round_stage(self, df, log_rounding):
+        base = self.original_data
+        numeric_cols = self.get_profile('original').numeric_cols
+        original_int_cols = [col for col in numeric_cols if pd.api.types.is_integer_dtype(base[col].dropna())]
+        df = df.copy(deep=False)
+        for col in numeric_cols:
+            if df[col].count() > 0:
+                if col in original_int_cols:
+                    df[col] = df[col].round().astype('Int64')
+                else:
+                    rounded = df[col].round(1)
+                    if not rounded.equals(df[col]): # Unchanged columns stay shared with the input
+                        df[col] = rounded
+        return df, ["Rounded numerical columns."] if log_rounding else []
+
+    def _dedup_stage(self, df, remove_duplicates, columns=None, mode='exact', threshold=FUZZY_THRESHOLD):
+        if not remove_duplicates:
+            return None
+        # Rows are only hashed again when an earlier stage changed them
+        row_hashes = self.get_profile('original').row_hashes if df is self.original_data else None
+        if columns is None and mode == 'exact':
+            initial_duplicates = self.get_profile('original').duplicate_rows
+            if initial_duplicates == 0:
+                return None
+            if row_hashes is None:
+                row_hashes = hash_rows(df)
+            keep = duplicate_mask(df, row_hashes=row_hashes)
+            return df[keep], [f"Removed {initial_duplicates} duplicate rows."], {'row_hashes': row_hashes[keep]}
+        keep = duplicate_mask(df, columns, mode, threshold)
+        removed = int((~keep).sum())
+        if removed == 0:
+            return None
+        kind = 'near-duplicate' if mode == 'fuzzy' else 'duplicate'
+        scope = f" matching on {', '.join(map(str, columns))}" if columns else ''
+        return df[keep], [f"Removed {removed} {kind} rows{scope}."]
+
+    def run_cleaning(self, options, progress=None):
+        """Executes the selected cleaning operations on original_data and rounds results.
+
+        The pipeline impute -> cap -> round -> dedup always starts from the loaded data, so repeated
+        calls never compound. Each stage output is memoized under its input's fingerprint plus the
+        stage options: changing only a later option reuses the earlier stages, and repeating the same
+        options is a cache hit. cleaned_data may be shared with the cache and must not be modified
+        in place. Each stage's time and memory delta is recorded in `timings` and on its log entries.
+        `progress(fraction, stage)`, when given, is called before every stage; background jobs use it
+        to report progress and to stop between stages once cancelled.
+        """
+        if self.schema is None: # original_data did not come from load_data, so it was never normalized
+            self._normalize_missing_values(self.original_data)
+            self._coerce_numeric_columns(self.original_data)
+            self.schema = infer_schema(self.original_data)
+            self._profiles = {}
+        profile = self.get_profile('original')
+        initial_rows = profile.n_rows
+        initial_missing = profile.missing_values
+        initial_duplicates = profile.duplicate_rows
+
+        imputation_method = options.get('imputationMethod')
+        outlier_method = options.get('outlierMethod')
+        knn_search = options.get('knnSearch', 'exact') if imputation_method == 'knn' else None
+        log_rounding = any([imputation_method != 'none', outlier_method != 'none'])
+        remove_duplicates = bool(options.get('removeDuplicates'))
+        dedup_columns = tuple(options.get('dedupColumns') or ()) or None
+        dedup_mode = options.get('dedupMode', 'exact')
+        dedup_threshold = float(options.get('fuzzyThreshold', FUZZY_THRESHOLD))
+        pipeline = [
+            ('impute', (imputation_method, knn_search), lambda df: self._impute_stage(df, imputation_method, knn_search)),
+            ('cap', outlier_method, lambda df: self._cap_stage(df, outlier_method)),
+            ('round', log_rounding, lambda df: self._round_stage(df, log_rounding)),
+            ('dedup', (remove_duplicates, dedup_columns, dedup_mode, dedup_threshold),
+             lambda df: self._dedup_stage(df, remove_duplicates, dedup_columns, dedup_mode, dedup_threshold)),
+        ]
+
+        self.timings = []
+        df, extra = self.original_data, {}
+        key = fingerprint_frame(df, profile.row_hashes)
+        for i, (stage, stage_options, run_stage) in enumerate(pipeline):
+            if progress: progress(i / (len(pipeline) + 1), stage)
+            key = chain_key(key, stage, stage_options)
+            with self._timed(stage) as timing:
+                entry = stage_cache.get(key)
+                timing['cached'] = entry is not None
+                if entry is None:
+                    result = run_stage(df)
+                    if result is not None:
+                        entry = (result[0], result[1], result[2] if len(result) > 2 else {})
+                        stage_cache.put(key, entry)
+            if entry is None: # Nothing to do for these options
+                continue
+            df, messages, extra = entry
+            for message in messages:
+                self.log_action(message, timing)
+
+        if progress: progress(len(pipeline) / (len(pipeline) + 1), 'analyze')
+        with self._timed('analyze'):
+            self.cleaned_data = df
+            if 'profile' not in extra:
+                extra['profile'] = DataProfile(df, row_hashes=extra.get('row_hashes'))
+            self._profiles['cleaned'] = extra['profile']
+            final_rows = len(self.cleaned_data)
+            final_missing = extra['profile'].missing_values
+
+            self.analyze_data_quality(is_before=False)
+
+        return {
+            'rows_removed': int(initial_rows - final_rows),
+            'missing_fixed': int(initial_missing - final_missing),
+            'duplicates_fixed': int(initial_duplicates)
+        }
+
+    def get_visualization_data(self, df):
+        """Generates columnar chart payloads for the frontend, downsampled over the whole dataset."""
+        return build_visualizations(df, max_points=VIZ_MAX_POINTS, method=VIZ_DOWNSAMPLE)
+
+    def generate_visualizations_for_pdf(self):
+        """Renders one distribution chart per numeric column as in-memory PNG bytes.
+
+        Rendering runs in parallel across CHART_WORKERS processes from binned/sampled summaries, and
+        charts are cached by the cleaned data's fingerprint so repeated reports reuse them.
+        """
+        numeric_cols = self.cleaned_data.select_dtypes(include=np.number).columns
+        numeric_cols = [col for col in numeric_cols if self.cleaned_data[col].count() > 0]
+        if len(numeric_cols) == 0: return []
+        fingerprint = fingerprint_frame(self.cleaned_data, self.get_profile('cleaned').row_hashes)
+        return chart_renderer.render(self.cleaned_data, numeric_cols, fingerprint)
+
+# --- Metrics ---
+metrics = MetricsRegistry()
+metrics.describe('datacleaner_http_request_duration_seconds', 'Request latency by route, method and status')
+metrics.describe('datacleaner_stage_duration_seconds', 'Latency of loading, cleaning and response stages')
+metrics.describe('process_resident_memory_bytes', 'Resident memory of this server process')
+
+# --- Chart Rendering ---
+chart_renderer = ChartRenderer(max_workers=CHART_WORKERS)
+
+# --- Stage Cache ---
+# One bounded cache per process, shared by all sessions: keys start from a content fingerprint of the
+# original data, so sessions that uploaded the same data reuse each other's stage outputs.
+stage_cache = StageCache(STAGE_CACHE_MAX_BYTES)
+
+def disable_stage_cache():
+    """Empties and turns off this process's stage cache.
+
+    For processes that clean each dataset once (job and batch workers), where cached stages would
+    never be reused and would sit outside the server's STAGE_CACHE_MAX_MB budget.
+    """
+    stage_cache.clear()
+    stage_cache.max_bytes = 0
+
+# --- PDF Report ---
+def build_report(cleaner, progress=None):
+    """Renders the PDF cleaning report and returns its bytes."""
+    with stage_timer('charts', metrics):
+        chart_images = cleaner.generate_visualizations_for_pdf()
+    if progress: progress(0.6, 'building PDF')
+    report_buffer = io.BytesIO()
+    doc = SimpleDocTemplate(report_buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    story.append(Paragraph("Data Cleaning Report", styles['h1']))
+    story.append(Spacer(1, 0.2 * inch))
+    story.append(Paragraph("Health Score Summary", styles['h2']))
+    health_data = [['', 'Before', 'After'], ['Health Score', f"{cleaner.stats_before['health_score']}%", f"{cleaner.stats_after['health_score']}%"]]
+    story.append(Table(health_data))
+    story.append(Spacer(1, 0.2 * inch))
+    stats_data = [['Metric', 'Before', 'After'], ['Total Rows', cleaner.stats_before['total_rows'], cleaner.stats_after['total_rows']], ['Missing Values', cleaner.stats_before['missing_values'], cleaner.stats_after['missing_values']], ['Duplicate Rows', cleaner.stats_before['duplicate_rows'], cleaner.stats_after['duplicate_rows']]]
+    table = Table(stats_data)
+    table.setStyle(TableStyle([('BACKGROUND', (0,0), (-1,0), colors.grey), ('GRID', (0,0), (-1,-1), 1, colors.black)]))
+    story.append(table)
+    story.append(Spacer(1, 0.2 * inch))
+    
+    if chart_images:
+        story.append(Paragraph("Cleaned Data Distributions", styles['h2']))
+        CHARTS_PER_PAGE = 2 # Keeps each page's flowables within the frame
+        for i, png in enumerate(chart_images):
+            story.append(Image(io.BytesIO(png), width=6*inch, height=3*inch, kind='proportional'))
+            if i % CHARTS_PER_PAGE == CHARTS_PER_PAGE - 1 or i == len(chart_images) - 1:
+                story.append(PageBreak())
+    
+    story.append(Paragraph("Cleaning Log", styles['h2']))
+    for entry in cleaner.cleaning_log: story.append(Paragraph(f"- {entry['action']}", styles['Normal']))
+    with stage_timer('pdf', metrics):
+        doc.build(story)
+    return report_buffer.getvalue()
@@ -0,0 +1,40 @@
+import os
+import sys
+import warnings
+
+import pytest
+
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_CSV = os.path.join(BACK_DIR, '..', 'DS', 'dirty_cafe_sales.csv')
+
+sys.path.insert(0, BACK_DIR)
+
+
+@pytest.fixture(scope='session')
+def server(tmp_path_factory):
+    """The Flask app module, with its upload, report, session and dataset folders in a temporary directory."""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('server'))
+    warnings.filterwarnings('ignore')
+    import main
+    yield main
+    os.chdir(cwd)
+
+
+@pytest.fixture(scope='session')
+def sample_csv():
+    return SAMPLE_CSV
+
+
+@pytest.fixture
+def client(server):
+    return server.app.test_client()
+
+
+@pytest.fixture
+def session_id(client):
+    """A session with the sample CSV uploaded."""
+    with open(SAMPLE_CSV, 'rb') as f:
+        response = client.post('/upload', data={'file': (f, 'dirty_cafe_sales.csv')}, content_type='multipart/form-data')
+    assert response.status_code == 200
+    return response.get_json()['session_id']
@@ -0,0 +1,184 @@
+import os
+import time
+
+import pytest
+
+import data_cleaner
+
+CLEAN_OPTIONS = {'imputationMethod': 'mean', 'outlierMethod': 'iqr', 'removeDuplicates': True}
+
+
+def wait_for_job(client, job_id, headers, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f'/jobs/{job_id}', headers=headers).get_json()
+        if status['status'] not in ('queued', 'running'):
+            return status
+        time.sleep(0.1)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_clean_then_download_report(client, session_id):
+    headers = {'X-Session-ID': session_id}
+    assert client.post('/clean', json=CLEAN_OPTIONS, headers=headers).status_code == 200
+    response = client.get('/download/report', headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    assert response.data.startswith(b'%PDF-')
+
+
+def test_report_job(client, session_id):
+    headers = {'X-Session-ID': session_id}
+    assert client.post('/clean', json=CLEAN_OPTIONS, headers=headers).status_code == 200
+    job_id = client.post('/jobs/report', headers=headers).get_json()['job_id']
+    assert wait_for_job(client, job_id, headers)['status'] == 'done'
+    response = client.get(f'/jobs/{job_id}/result', headers=headers)
+    assert response.data.startswith(b'%PDF-')
+
+
+def test_report_job_after_parallel_report_in_server(server, client, session_id):
+    headers = {'X-Session-ID': session_id}
+    data_cleaner.chart_renderer.max_workers = 2
+    try:
+        assert client.post('/clean', json=CLEAN_OPTIONS, headers=headers).status_code == 200
+        assert client.get('/download/report', headers=headers).status_code == 200
+        assert client.post('/clean', json={**CLEAN_OPTIONS, 'outlierMethod': 'zscore'}, headers=headers).status_code == 200
+        job_id = client.post('/jobs/report', headers=headers).get_json()['job_id']
+        assert wait_for_job(client, job_id, headers)['status'] == 'done'
+    finally:
+        data_cleaner.chart_renderer.max_workers = data_cleaner.CHART_WORKERS
+
+
+def test_upload_with_minmax_downsampling(server, client, sample_csv, monkeypatch):
+    monkeypatch.setattr(data_cleaner, 'VIZ_DOWNSAMPLE', 'minmax')
+    with open(sample_csv, 'rb') as f:
+        response = client.post('/upload', data={'file': (f, 'dirty_cafe_sales.csv')}, content_type='multipart/form-data')
+    assert response.status_code == 200
+    scatter = [chart for chart in response.get_json()['visualizations'] if chart['type'] == 'scatter']
+    assert scatter and all(len(chart['x']) <= data_cleaner.VIZ_MAX_POINTS for chart in scatter)
+
+
+def test_cleaning_leaves_original_data_unchanged(server, sample_csv):
+    for imputation in ('mean', 'median', 'knn'):
+        for outliers in ('iqr', 'zscore', 'winsorization'):
+            cleaner = server.AdvancedDataCleaner()
+            assert cleaner.load_data(sample_csv)
+            before = cleaner.original_data.copy()
+            cleaner.run_cleaning({'imputationMethod': imputation, 'outlierMethod': outliers, 'removeDuplicates': True})
+            assert cleaner.original_data.equals(before)
+
+
+def test_spilled_session_survives_dataset_pruning(server, client, session_id):
+    headers = {'X-Session-ID': session_id}
+    session = server.sessions._get(session_id)
+    with session.lock:
+        server.sessions._spill(session_id, session, drop=True)
+    server.datasets.max_bytes = 0
+    server.datasets.prune()
+    try:
+        response = client.post('/clean', json=CLEAN_OPTIONS, headers=headers)
+    finally:
+        server.datasets.max_bytes = server.DATASET_STORE_MAX_BYTES
+    assert response.status_code == 200
+
+
+def test_unreadable_session_is_not_found(server, client, session_id):
+    headers = {'X-Session-ID': session_id}
+    session = server.sessions._get(session_id)
+    with session.lock:
+        server.sessions._spill(session_id, session, drop=True)
+    for name in os.listdir(server.sessions._session_dir(session_id)):
+        if name != 'state.pkl':
+            os.remove(os.path.join(server.sessions._session_dir(session_id), name))
+    assert client.post('/clean', json=CLEAN_OPTIONS, headers=headers).status_code == 404
+    assert client.get('/preview', headers=headers).status_code == 404
+
+
+def test_stage_cache_is_shared_and_bounded_per_process(server, sample_csv):
+    first, second = server.AdvancedDataCleaner(), server.AdvancedDataCleaner()
+    assert first.load_data(sample_csv) and second.load_data(sample_csv)
+    data_cleaner.stage_cache.clear()
+    first.run_cleaning(CLEAN_OPTIONS)
+    cached = len(data_cleaner.stage_cache)
+    second.run_cleaning(CLEAN_OPTIONS)
+    assert cached > 0 and len(data_cleaner.stage_cache) == cached
+    assert all(timing.get('cached') for timing in second.timings if timing['stage'] in ('impute', 'cap', 'round'))
+    assert not hasattr(first, '_stage_cache')
+
+
+def test_clean_job_result_is_stored_in_session(client, session_id):
+    headers = {'X-Session-ID': session_id}
+    job_id = client.post('/jobs/clean', json=CLEAN_OPTIONS, headers=headers).get_json()['job_id']
+    assert wait_for_job(client, job_id, headers)['status'] == 'done'
+    result = client.get(f'/jobs/{job_id}/result', headers=headers).get_json()
+    preview = client.get('/preview', query_string={'which': 'cleaned', 'limit': 5}, headers=headers).get_json()
+    assert preview['total_rows'] == result['stats_after']['total_rows']
+
+
+def test_clean_job_snapshot_leaves_stored_data_out(server, client, session_id):
+    with server.sessions.acquire(session_id) as cleaner:
+        state = cleaner.job_state(frames=('original_data',), dataset_store=server.datasets)
+        assert 'original_data' not in state and 'cleaned_data' not in state
+        restored = server.AdvancedDataCleaner.from_job_state(state, server.datasets)
+        assert restored.original_data.equals(cleaner.original_data)
+
+
+def test_run_cleaning_stops_at_a_cancelled_checkpoint(server, sample_csv):
+    from utils.jobs import JobCancelled
+    cleaner = server.AdvancedDataCleaner()
+    assert cleaner.load_data(sample_csv)
+    data_cleaner.stage_cache.clear()
+    stages = []
+
+    def progress(fraction, stage):
+        stages.append(stage)
+        if stage == 'cap':
+            raise JobCancelled('job')
+
+    with pytest.raises(JobCancelled):
+        cleaner.run_cleaning(CLEAN_OPTIONS, progress)
+    assert stages == ['impute', 'cap']
+    assert [timing['stage'] for timing in cleaner.timings] == ['impute']
+
+
+def test_invalid_knn_search_is_rejected(client, session_id):
+    headers = {'X-Session-ID': session_id}
+    for route in ('/clean', '/jobs/clean'):
+        response = client.post(route, json={**CLEAN_OPTIONS, 'imputationMethod': 'knn', 'knnSearch': 'bogus'}, headers=headers)
+        assert response.status_code == 400
+        assert 'knnSearch' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('threshold', ['abc', None, True, 0, 1.5, 'nan'])
+def test_invalid_fuzzy_threshold_is_rejected(client, session_id, threshold):
+    options = {**CLEAN_OPTIONS, 'dedupMode': 'fuzzy', 'fuzzyThreshold': threshold}
+    response = client.post('/clean', json=options, headers={'X-Session-ID': session_id})
+    assert response.status_code == 400
+    assert 'fuzzyThreshold' in response.get_json()['error']
+
+
+def test_fuzzy_dedup_with_threshold(client, session_id):
+    options = {**CLEAN_OPTIONS, 'dedupMode': 'fuzzy', 'fuzzyThreshold': '0.9'}
+    response = client.post('/clean', json=options, headers={'X-Session-ID': session_id})
+    assert response.status_code == 200
+
+
+def test_reloading_stored_dataset_keeps_memory_before_compaction(server, sample_csv, tmp_path):
+    store = server.DatasetStore(str(tmp_path))
+    first, second = server.AdvancedDataCleaner(), server.AdvancedDataCleaner()
+    assert first.load_data(sample_csv, dataset_store=store) and second.load_data(sample_csv, dataset_store=store)
+    assert 'read_dataset' in [timing['stage'] for timing in second.timings]
+    assert second.stats_before['memory_before_compaction_mb'] == first.stats_before['memory_before_compaction_mb']
+    assert second.stats_before['memory_before_compaction_mb'] > second.stats_before['memory_mb']
+
+
+def test_compaction_settings_are_part_of_the_dataset_key(server, sample_csv, tmp_path, monkeypatch):
+    store = server.DatasetStore(str(tmp_path))
+    compacted = server.AdvancedDataCleaner()
+    assert compacted.load_data(sample_csv, dataset_store=store)
+    monkeypatch.setattr(data_cleaner, 'COMPACT_DATA', False)
+    plain = server.AdvancedDataCleaner()
+    assert plain.load_data(sample_csv, dataset_store=store)
+    assert plain.dataset_id != compacted.dataset_id
+    assert 'read_dataset' not in [timing['stage'] for timing in plain.timings]
+    assert not any(isinstance(dtype, server.pd.CategoricalDtype) for dtype in plain.original_data.dtypes)
@@ -0,0 +1,42 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import data_cleaner
+from batch_clean import clean_file, collect_inputs, output_names
+
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG = {'imputationMethod': 'median', 'outlierMethod': 'iqr', 'removeDuplicates': True}
+
+
+def test_cli_creates_only_its_output_directory(sample_csv, tmp_path):
+    (tmp_path / 'in').mkdir()
+    for name in ('a.csv', 'b.csv'):
+        shutil.copy(sample_csv, tmp_path / 'in' / name)
+    (tmp_path / 'clean.json').write_text(json.dumps(CONFIG))
+    completed = subprocess.run([sys.executable, os.path.join(BACK_DIR, 'batch_clean.py'), 'in', '--config', 'clean.json',
+                                '--output-dir', 'out', '--workers', '2'], cwd=tmp_path, capture_output=True, text=True, timeout=300)
+    assert completed.returncode == 0, completed.stderr
+    assert sorted(os.listdir(tmp_path)) == ['clean.json', 'in', 'out']
+    summary = json.loads((tmp_path / 'out' / 'batch_summary.json').read_text())
+    assert [result['status'] for result in summary['files']] == ['ok', 'ok']
+    assert sorted(os.listdir(tmp_path / 'out')) == ['a_cleaned.csv', 'a_report.json', 'b_cleaned.csv', 'b_report.json', 'batch_summary.json']
+
+
+def test_clean_file_leaves_no_stage_cache(sample_csv, tmp_path, monkeypatch):
+    monkeypatch.setattr(data_cleaner.stage_cache, 'max_bytes', data_cleaner.stage_cache.max_bytes)
+    result = clean_file(sample_csv, 'cafe', CONFIG, str(tmp_path), stream_threshold=float('inf'), chunksize=1000)
+    assert result['status'] == 'ok' and result['mode'] == 'in-memory'
+    assert result['rows_after'] <= result['rows_before']
+    assert len(data_cleaner.stage_cache) == 0
+
+
+def test_inputs_and_output_names(tmp_path):
+    for name in ('a.csv', 'b.xlsx', 'notes.txt', os.path.join('sub', 'a.csv')):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text('x\n1\n')
+    files = collect_inputs([str(tmp_path)], recursive=True)
+    assert [os.path.relpath(path, tmp_path) for path in files] == ['a.csv', 'b.xlsx', os.path.join('sub', 'a.csv')]
+    assert output_names(files) == ['a', 'b', 'a_2']
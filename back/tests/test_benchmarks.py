@@ -0,0 +1,39 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_pipeline import compare, main_cli
+from benchmarks.dirty_data import MISSING_TOKENS, generate_dirty_data
+
+
+def test_generator_is_deterministic_and_dirty():
+    df = generate_dirty_data(rows=2000, extra_numeric=2, extra_text=1, seed=3)
+    pd.testing.assert_frame_equal(df, generate_dirty_data(rows=2000, extra_numeric=2, extra_text=1, seed=3))
+    assert len(df) == 2040
+    assert {'Metric 0', 'Metric 1', 'Note 0'} <= set(df.columns)
+    assert df.duplicated().sum() > 0
+    quantity = df['Quantity']
+    assert quantity.isin(MISSING_TOKENS).mean() > 0.03
+    values = pd.to_numeric(quantity, errors='coerce')
+    assert values.max() > 10 # Outliers scaled 10-50x beyond the 1-5 range
+    assert np.isclose(values.dropna().round() - values.dropna(), 0).mean() > 0.9
+
+
+def test_compare_flags_only_significant_slowdowns():
+    baseline = {'stages': {'load': {'seconds': 1.0}, 'parse': {'seconds': 0.001}, 'dedup': {'seconds': 0.5}}}
+    results = {'stages': {'load': {'seconds': 1.5}, 'parse': {'seconds': 0.005}, 'dedup': {'seconds': 0.55}, 'new': {'seconds': 9.0}}}
+    assert compare(results, baseline, tolerance=0.2, min_seconds=0.01) == [
+        {'stage': 'load', 'baseline_seconds': 1.0, 'seconds': 1.5, 'ratio': 1.5}]
+
+
+def test_cli_writes_results_and_fails_on_regression(tmp_path):
+    output, baseline = tmp_path / 'results.json', tmp_path / 'baseline.json'
+    args = ['--rows', '500', '--repeat', '1', '--skip', 'pdf_report', 'impute[knn]', '--output', str(output)]
+    assert main_cli(args) == 0
+    results = json.loads(output.read_text())
+    assert {'load', 'load[cached]', 'impute[mean]', 'outliers[iqr]', 'dedup'} <= set(results['stages'])
+    assert 'pdf_report' not in results['stages'] and results['meta']['params']['rows'] == 500
+    results['stages']['load']['seconds'] /= 100
+    baseline.write_text(json.dumps(results))
+    assert main_cli(args + ['--baseline', str(baseline), '--min-seconds', '0']) == 1
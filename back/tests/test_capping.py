@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats.mstats import winsorize
+
+from utils.capping import cap_block
+from utils.column_profile import MAD_MULTIPLIER
+
+
+def dirty_block(n_rows=1000, n_cols=6, seed=0):
+    rng = np.random.default_rng(seed)
+    block = rng.normal(50, 10, size=(n_rows, n_cols))
+    block[rng.random(block.shape) < 0.01] *= 20 # Outliers
+    block[rng.random(block.shape) < 0.1] = np.nan
+    block[:, -1] = np.nan # A column with no values
+    block[:, -2] = np.where(np.arange(n_rows) % 2, 5.0, np.nan) # Zero MAD: never capped by iqr
+    return block
+
+
+def reference_iqr(series):
+    values = series.dropna()
+    median = values.median()
+    mad = (values - median).abs().median()
+    if len(values) < 3 or mad == 0:
+        return series
+    spread = MAD_MULTIPLIER * mad / 0.6745
+    return series.clip(median - spread, median + spread)
+
+
+def reference_zscore(series):
+    mean, std = series.mean(), series.std()
+    return series.clip(mean - 3 * std, mean + 3 * std)
+
+
+def reference_winsorization(series):
+    values = series.dropna()
+    if values.empty:
+        return series
+    capped = series.copy()
+    capped[values.index] = np.asarray(winsorize(values.to_numpy(), limits=(0.05, 0.05)))
+    return capped
+
+
+REFERENCES = {'iqr': reference_iqr, 'zscore': reference_zscore, 'winsorization': reference_winsorization}
+
+
+@pytest.mark.parametrize('method', sorted(REFERENCES))
+def test_cap_block_matches_per_column_loops(method):
+    block = dirty_block()
+    expected = pd.DataFrame(block).apply(REFERENCES[method]).to_numpy()
+    np.testing.assert_allclose(cap_block(block, method), expected, rtol=1e-12, equal_nan=True)
+
+
+@pytest.mark.parametrize('method', sorted(REFERENCES))
+def test_parallel_column_groups_match_a_single_call(method):
+    block = dirty_block(n_rows=200, n_cols=20)
+    np.testing.assert_allclose(cap_block(block, method, n_jobs=4, min_columns=2), cap_block(block, method), rtol=1e-12, equal_nan=True)
+
+
+def test_winsorization_without_missing_values_uses_the_shared_partition():
+    block = np.random.default_rng(1).normal(size=(500, 4))
+    expected = np.column_stack([np.asarray(winsorize(col, limits=(0.05, 0.05))) for col in block.T])
+    np.testing.assert_array_equal(cap_block(block, 'winsorization'), expected)
@@ -0,0 +1,60 @@
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.charts import ChartRenderer
+
+renderer = ChartRenderer(max_workers=2)
+
+
+def sample_frame(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'a': rng.normal(size=n), 'b': rng.exponential(size=n)})
+
+
+def render_in_job_worker(fingerprint):
+    return len(renderer.render(sample_frame(), ['a', 'b'], fingerprint)), renderer._executor_pid == os.getpid()
+
+
+def wait_for_child(pid, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        finished, status = os.waitpid(pid, os.WNOHANG)
+        if finished:
+            return os.waitstatus_to_exitcode(status)
+        time.sleep(0.1)
+    os.kill(pid, signal.SIGKILL)
+    raise AssertionError('forked renderer did not finish')
+
+
+def test_render_returns_cached_png_per_column():
+    images = renderer.render(sample_frame(), ['a', 'b'], 'cached')
+    assert [png[:8] for png in images] == [b'\x89PNG\r\n\x1a\n'] * 2
+    assert renderer.render(sample_frame(seed=1), ['a', 'b'], 'cached') == images
+    renderer.clear()
+    assert renderer.render(sample_frame(seed=1), ['a', 'b'], 'cached') != images
+
+
+def test_forked_server_worker_starts_its_own_pool():
+    renderer.render(sample_frame(), ['a', 'b'], 'parent') # Starts the pool in this process
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            images = renderer.render(sample_frame(), ['a', 'b'], 'forked')
+            code = 0 if len(images) == 2 and renderer._executor_pid == os.getpid() else 1
+        finally:
+            renderer.shutdown()
+            os._exit(code)
+    assert wait_for_child(pid) == 0
+
+
+def test_job_worker_renders_serially():
+    renderer.render(sample_frame(), ['a', 'b'], 'parent')
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('fork')) as executor:
+        assert executor.submit(render_in_job_worker, 'job').result(timeout=60) == (2, False)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from utils.column_profile import MAD_MULTIPLIER, DataProfile, mad_bounds
+
+
+def dirty_frame(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'price': rng.normal(10, 2, n),
+        'quantity': rng.integers(1, 6, n).astype(float),
+        'constant': np.ones(n),
+        'empty': np.full(n, np.nan),
+        'item': rng.choice(['coffee', 'tea', None], n),
+    })
+    df.loc[rng.choice(n, 200, replace=False), 'price'] = np.nan
+    df.loc[rng.choice(n, 20, replace=False), 'price'] = 1000.0
+    df.loc[rng.choice(n, 50, replace=False), 'quantity'] = np.nan
+    return pd.concat([df, df.iloc[:30]], ignore_index=True)
+
+
+def mad_outliers(series):
+    values = series.dropna()
+    median = values.median()
+    mad = (values - median).abs().median()
+    if len(values) < 3 or mad == 0:
+        return 0
+    spread = MAD_MULTIPLIER * mad / 0.6745
+    return int(((values < median - spread) | (values > median + spread)).sum())
+
+
+def test_profile_matches_per_column_pandas_statistics():
+    df = dirty_frame()
+    profile = DataProfile(df)
+    assert (profile.n_rows, profile.n_columns) == df.shape
+    pd.testing.assert_series_equal(profile.null_counts, df.isnull().sum())
+    assert profile.missing_values == int(df.isnull().sum().sum())
+    assert profile.duplicate_rows == int(df.duplicated().sum()) >= 30
+    assert list(profile.numeric_cols) == ['price', 'quantity', 'constant', 'empty']
+    for col in ['price', 'quantity', 'constant']:
+        row = profile.numeric.loc[col]
+        assert row['count'] == df[col].count()
+        assert np.isclose(row['mean'], df[col].mean())
+        assert np.isclose(row['std'], df[col].std(), equal_nan=True)
+        assert np.isclose(row['median'], df[col].median())
+        for q in (5, 25, 50, 75, 95):
+            assert np.isclose(row[f'q{q:02d}'], df[col].quantile(q / 100))
+        assert row['mad_outliers'] == mad_outliers(df[col])
+    assert profile.numeric.loc['price', 'mad_outliers'] >= 20
+    assert profile.numeric.loc['constant', 'mad_outliers'] == 0
+    assert profile.numeric.loc['empty', 'count'] == 0 and np.isnan(profile.numeric.loc['empty', 'mean'])
+
+
+def test_precomputed_row_hashes_are_used():
+    df = dirty_frame(200)
+    hashes = DataProfile(df).row_hashes
+    assert DataProfile(df, row_hashes=hashes).row_hashes is hashes
+
+
+def test_mad_bounds_skip_short_and_constant_columns():
+    block = np.array([[1.0, 5.0, 1.0], [2.0, 5.0, np.nan], [3.0, 5.0, np.nan], [100.0, 5.0, np.nan]])
+    lower, upper = mad_bounds(block)
+    assert lower[0] < 1.0 and 3.0 < upper[0] < 100.0
+    assert np.isnan(lower[1:]).all() and np.isnan(upper[1:]).all()
+
+
+def test_health_score():
+    df = pd.DataFrame({'a': [1.0, 1.0, np.nan, 4.0], 'b': ['x', 'x', 'y', 'z']})
+    completeness, uniqueness = 1 - 1 / 8, 1 - 1 / 4
+    assert DataProfile(df).health_score() == round((completeness * 0.7 + uniqueness * 0.3) * 100, 2)
+    assert DataProfile(pd.DataFrame()).health_score() == 0
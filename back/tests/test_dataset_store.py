@@ -0,0 +1,59 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.dataset_store import DatasetStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DatasetStore(str(tmp_path / 'datasets'))
+
+
+def frame(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'price': rng.normal(size=n), 'quantity': rng.integers(0, 10, n),
+                         'item': rng.choice(['coffee', 'tea', 'cake'], n).astype(object)})
+
+
+def test_digest_depends_on_content_extension_and_variant(tmp_path, store):
+    for name, text in (('a.csv', 'x\n1\n'), ('b.csv', 'x\n1\n'), ('c.csv', 'x\n2\n'), ('a.txt', 'x\n1\n')):
+        (tmp_path / name).write_text(text)
+    digest = lambda name, variant='': store.digest_file(str(tmp_path / name), variant)
+    assert digest('a.csv') == digest('b.csv')
+    assert len({digest('a.csv'), digest('c.csv'), digest('a.txt'), digest('a.csv', 'compact=0')}) == 4
+
+
+def test_round_trip_with_column_and_row_selection(store):
+    df = frame()
+    assert not store.has('data') and not store.has(None)
+    assert store.put('data', df, metadata={'memory_info': {'memory_before_mb': 1.5}})
+    assert store.has('data') and store.num_rows('data') == len(df)
+    pd.testing.assert_frame_equal(store.read('data'), df, check_dtype=False)
+    window = store.read('data', columns=['price', 'item'], offset=100, length=10)
+    pd.testing.assert_frame_equal(window, df.loc[100:109, ['price', 'item']], check_dtype=False)
+    assert window['item'].dtype == pd.StringDtype('pyarrow')
+    assert store.metadata('data') == {'memory_info': {'memory_before_mb': 1.5}}
+
+
+def test_unrepresentable_frame_is_not_stored(store):
+    df = pd.DataFrame({'mixed': [1, 'a', 2.5]})
+    assert not store.put('mixed', df)
+    assert not store.has('mixed') and os.listdir(store.root) == []
+
+
+def test_prune_removes_least_recently_used_and_links_survive(store, tmp_path):
+    for i in range(3):
+        assert store.put(f'd{i}', frame(seed=i))
+        os.utime(store._path(f'd{i}'), (time.time() - 100 + i, time.time() - 100 + i))
+    size = os.path.getsize(store._path('d0'))
+    store.read('d0') # Most recently used now
+    assert store.link('d1', str(tmp_path / 'kept.arrow'))
+    store.max_bytes = int(size * 2.5)
+    store.prune()
+    assert store.has('d0') and not store.has('d1') and store.has('d2')
+    assert os.path.exists(tmp_path / 'kept.arrow')
+    assert not store.link('d1', str(tmp_path / 'gone.arrow'))
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from utils.column_profile import hash_rows
+from utils.dedup import RowHashSet, duplicate_mask
+
+
+def test_row_hash_set_matches_a_python_set_across_chunks():
+    rng = np.random.default_rng(0)
+    hashes, seen = RowHashSet(), set()
+    for _ in range(200):
+        chunk = rng.integers(0, 20_000, size=rng.integers(0, 300)).astype(np.uint64)
+        expected = np.zeros(len(chunk), dtype=bool)
+        for i, value in enumerate(chunk.tolist()):
+            if value not in seen:
+                expected[i] = True
+                seen.add(value)
+        np.testing.assert_array_equal(hashes.first_seen(chunk), expected)
+    assert len(hashes) == len(seen)
+
+
+def frame_with_duplicates():
+    return pd.DataFrame({
+        'name': ['Ann Lee', 'Bob', 'Ann Lee', 'ann  lee', 'Cy', 'Bob', None, None],
+        'city': ['Oslo', 'Rome', 'Oslo', 'Oslo', 'Rome', 'Paris', 'Oslo', 'Oslo'],
+        'score': [1.0, 2.0, 1.0, 1.001, np.nan, 2.0, np.nan, np.nan],
+    })
+
+
+def test_exact_mode_matches_pandas_duplicated():
+    df = frame_with_duplicates()
+    np.testing.assert_array_equal(duplicate_mask(df), ~df.duplicated(keep='first').to_numpy())
+
+
+def test_exact_mode_accepts_precomputed_row_hashes():
+    df = frame_with_duplicates()
+    np.testing.assert_array_equal(duplicate_mask(df, row_hashes=hash_rows(df)), duplicate_mask(df))
+
+
+def test_key_columns_match_pandas_duplicated_subset():
+    df = frame_with_duplicates()
+    for columns in (['name'], ['city'], ['name', 'city']):
+        expected = ~df.duplicated(subset=columns, keep='first').to_numpy()
+        np.testing.assert_array_equal(duplicate_mask(df, columns), expected)
+
+
+def test_fuzzy_mode_merges_case_whitespace_and_rounding_variants():
+    df = frame_with_duplicates()
+    keep = duplicate_mask(df, mode='fuzzy', threshold=1.0)
+    # 'ann  lee' / 1.001 normalizes to row 0; the all-missing-name rows match each other
+    np.testing.assert_array_equal(keep, [True, True, False, False, True, True, True, False])
+
+
+def test_fuzzy_mode_links_rows_that_mostly_agree():
+    rng = np.random.default_rng(0)
+    base = pd.DataFrame(rng.integers(0, 1000, size=(300, 10)), columns=[f'c{i}' for i in range(10)])
+    noisy = base.copy()
+    noisy.iloc[:, 0] = -1 # One of ten columns differs: Jaccard 9/11 >= 0.8
+    df = pd.concat([base, noisy], ignore_index=True)
+    keep = duplicate_mask(df, mode='fuzzy', threshold=0.8)
+    assert keep[:300].all()
+    assert (~keep[300:]).mean() > 0.95 # MinHash may miss a few pairs, never invents them
+    assert duplicate_mask(base, mode='fuzzy', threshold=0.8).all()
@@ -0,0 +1,92 @@
+import os
+import time
+
+import pytest
+
+from utils.jobs import JobManager, DONE, FAILED, CANCELLED
+
+MARKER = {'initialized': False}
+
+
+def mark_initialized():
+    MARKER['initialized'] = True
+
+
+def add(a, b, progress):
+    progress(0.5, 'adding')
+    return a + b, MARKER['initialized']
+
+
+def fail(progress):
+    raise ValueError('bad input')
+
+
+def spin(progress):
+    for i in range(600):
+        progress(i / 600, 'spinning')
+        time.sleep(0.05)
+    return 'never cancelled'
+
+
+@pytest.fixture
+def managers(tmp_path):
+    """Two managers sharing one state directory, like two server processes."""
+    first = JobManager(str(tmp_path), max_workers=1, initializer=mark_initialized)
+    second = JobManager(str(tmp_path), max_workers=1)
+    yield first, second
+    first.shutdown()
+    second.shutdown()
+
+
+def wait_for(manager, job_id, owner, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id, owner)
+        if job.status in (DONE, FAILED, CANCELLED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_another_manager_reports_status_and_result(managers):
+    first, second = managers
+    job_id = first.submit('add', 'alice', add, 2, 3, on_done=lambda job, result: {'sum': result[0], 'initialized': result[1]})
+    job = wait_for(second, job_id, 'alice')
+    assert job.status == DONE and job.kind == 'add'
+    assert second.status(job)['progress'] == 1.0
+    assert second.result(job) == {'sum': 5, 'initialized': True}
+    assert second.get(job_id, 'bob') is None
+    assert second.get('../etc', 'alice') is None
+
+
+def test_failure_is_recorded(managers):
+    first, second = managers
+    job = wait_for(second, first.submit('fail', 'alice', fail), 'alice')
+    assert job.status == FAILED and job.error == 'bad input'
+
+
+def test_another_manager_cancels_a_running_job(managers):
+    first, second = managers
+    job_id = first.submit('spin', 'alice', spin)
+    deadline = time.time() + 30
+    while second.get(job_id, 'alice').status != 'running':
+        assert time.time() < deadline
+        time.sleep(0.05)
+    assert second.cancel(second.get(job_id, 'alice'))
+    job = wait_for(second, job_id, 'alice')
+    assert job.status == CANCELLED
+    assert not second.cancel(job)
+    while sorted(os.listdir(first.state_dir)) != [f'{job_id}.json']: # Progress and cancel flags are removed
+        assert time.time() < deadline
+        time.sleep(0.05)
+
+
+def test_finished_jobs_expire_in_every_manager(managers):
+    first, second = managers
+    job_id = first.submit('add', 'alice', add, 1, 1)
+    wait_for(first, job_id, 'alice')
+    second.retention = 0
+    deadline = time.time() + 30
+    while os.listdir(first.state_dir):
+        assert second.get(job_id, 'alice') is None and time.time() < deadline
+        time.sleep(0.05)
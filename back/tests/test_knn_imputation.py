@@ -0,0 +1,86 @@
+import numpy as np
+from sklearn.impute import KNNImputer
+
+from utils.knn_imputation import MAX_QUERY_NEIGHBOURS, FastKNNImputer
+
+
+def correlated(n=2000, n_cols=5, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=(n, 1))
+    return base + 0.1 * rng.normal(size=(n, n_cols)), rng
+
+
+def brute_force(X, k=5):
+    """Per missing value, the mean of the k nearest rows that have it and every feature the row has."""
+    X = np.asarray(X, dtype=float)
+    missing = np.isnan(X)
+    imputed = X.copy()
+    for i in np.flatnonzero(missing.any(axis=1)):
+        observed = ~missing[i]
+        for j in np.flatnonzero(missing[i]):
+            donors = np.flatnonzero(~missing[:, observed].any(axis=1) & ~missing[:, j])
+            if not observed.any() or len(donors) == 0:
+                imputed[i, j] = np.nanmean(X[:, j])
+                continue
+            distances = np.linalg.norm(X[np.ix_(donors, observed)] - X[i, observed], axis=1)
+            imputed[i, j] = X[donors[np.argsort(distances)[:k]], j].mean()
+    return imputed
+
+
+def test_matches_sklearn_with_one_incomplete_column():
+    X, rng = correlated()
+    X[rng.random(len(X)) < 0.1, 2] = np.nan
+    np.testing.assert_allclose(FastKNNImputer().fit_transform(X), KNNImputer().fit_transform(X))
+
+
+def test_close_to_sklearn_with_scattered_missing_values():
+    truth, rng = correlated()
+    X = truth.copy()
+    mask = rng.random(X.shape) < 0.05
+    X[mask] = np.nan
+    fast_error = np.abs(FastKNNImputer().fit_transform(X)[mask] - truth[mask]).mean()
+    sklearn_error = np.abs(KNNImputer().fit_transform(X)[mask] - truth[mask]).mean()
+    assert fast_error < 1.1 * sklearn_error
+
+
+def test_near_empty_column_does_not_force_mean_imputation():
+    truth, rng = correlated()
+    X = truth.copy()
+    mask = rng.random(X.shape) < 0.1
+    X[mask] = np.nan
+    X[3:, 4] = np.nan # Only three values left in the last column
+    imputer = FastKNNImputer()
+    imputed = imputer.fit_transform(X)
+    target = mask[:, 0]
+    assert np.abs(imputed[target, 0] - truth[target, 0]).mean() < 0.2
+    assert not np.allclose(imputed[target, 0], np.nanmean(X[:, 0]))
+    assert imputer.n_mean_fallback_ == 0
+
+
+def test_column_without_values_falls_back_to_mean_and_is_counted():
+    X, _ = correlated(n=50)
+    X[:, 1] = np.nan
+    X[0, 0] = np.nan
+    imputer = FastKNNImputer()
+    imputed = imputer.fit_transform(X)
+    assert np.isnan(imputed[:, 1]).all()
+    assert not np.isnan(imputed[0, 0])
+    assert imputer.n_mean_fallback_ == 50
+
+
+def test_approximate_search_imputes_every_value():
+    X, rng = correlated()
+    X[rng.random(X.shape) < 0.05] = np.nan
+    imputed = FastKNNImputer(search='approximate', max_donors=500).fit_transform(X)
+    assert not np.isnan(imputed).any()
+
+
+def test_sparse_column_matches_brute_force_with_bounded_queries(monkeypatch):
+    X, rng = correlated(n=4000)
+    X[rng.random(len(X)) < 0.1, 0] = np.nan
+    X[rng.permutation(len(X))[5:], 3] = np.nan # Only five donors for this column
+    widest = []
+    query = FastKNNImputer._query
+    monkeypatch.setattr(FastKNNImputer, '_query', lambda self, tree, X, rows, observed, k: widest.append(k) or query(self, tree, X, rows, observed, k))
+    np.testing.assert_allclose(FastKNNImputer().fit_transform(X), brute_force(X))
+    assert max(widest) <= MAX_QUERY_NEIGHBOURS
@@ -0,0 +1,60 @@
+import os
+import time
+
+from utils.metrics import MetricsRegistry, stage_timer
+from utils.profiler import SamplingProfiler
+
+
+def test_histogram_renders_cumulative_buckets_and_escaped_labels():
+    registry = MetricsRegistry(buckets=(0.1, 1))
+    registry.describe('latency_seconds', 'Request latency')
+    for value in (0.05, 0.5, 2):
+        registry.observe('latency_seconds', value, route='/clean', method='POST')
+    registry.observe('latency_seconds', 0.01, route='/a"b', method='GET')
+    lines = registry.render({'rss_bytes': 1024, 'missing': None}).splitlines()
+    assert lines[:2] == ['# HELP latency_seconds Request latency', '# TYPE latency_seconds histogram']
+    assert 'latency_seconds_bucket{method="POST",route="/clean",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{method="POST",route="/clean",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{method="POST",route="/clean",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{method="POST",route="/clean"} 2.55' in lines
+    assert 'latency_seconds_count{method="GET",route="/a\\"b"} 1' in lines
+    assert lines[-3:] == ['# HELP rss_bytes rss_bytes', '# TYPE rss_bytes gauge', 'rss_bytes 1024']
+    assert not any(line.startswith('missing') for line in lines)
+
+
+def test_stage_timer_fills_timing_and_observes():
+    registry = MetricsRegistry()
+    with stage_timer('impute', registry) as timing:
+        time.sleep(0.01)
+    assert timing['stage'] == 'impute' and timing['seconds'] >= 0.01
+    assert isinstance(timing['memory_delta_mb'], float)
+    assert 'datacleaner_stage_duration_seconds_count{stage="impute"} 1' in registry.render()
+
+
+def busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+def test_sampling_profiler_collapses_stacks(tmp_path):
+    profiler = SamplingProfiler(interval=0.001).start()
+    busy_loop(0.2)
+    profiler.stop()
+    assert any('busy_loop (test_metrics.py' in stack for stack in profiler.samples)
+    path = profiler.dump(str(tmp_path / 'profiles'), 'POST_/clean')
+    assert os.path.basename(path).endswith('_POST__clean.folded')
+    with open(path) as f:
+        assert all(line.rsplit(' ', 1)[1].strip().isdigit() for line in f)
+
+
+def test_metrics_endpoint_and_server_timing(client, session_id):
+    response = client.post('/clean', json={'imputationMethod': 'mean', 'outlierMethod': 'iqr', 'removeDuplicates': True},
+                           headers={'X-Session-ID': session_id})
+    timings = ', '.join(response.headers.getlist('Server-Timing'))
+    assert 'encode;dur=' in timings and 'total;dur=' in timings
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'datacleaner_http_request_duration_seconds_count{method="POST",route="/clean",status="200"}' in body
+    for stage in ('parse', 'impute', 'cap', 'encode'):
+        assert f'datacleaner_stage_duration_seconds_count{{stage="{stage}"}}' in body
+    assert 'process_resident_memory_bytes' in body
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.column_profile import DataProfile
+from utils.preview import outlier_cells, select_rows
+
+
+def preview(client, session_id, **query):
+    response = client.get('/preview', query_string=query, headers={'X-Session-ID': session_id})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+@pytest.fixture
+def original(server, session_id):
+    with server.sessions.acquire(session_id) as cleaner:
+        return cleaner.original_data
+
+
+def test_pages_cover_the_data_in_order(client, session_id, original):
+    first = preview(client, session_id, which='original', limit=50)
+    second = preview(client, session_id, which='original', offset=50, limit=50)
+    assert first['total_rows'] == len(original)
+    assert first['preview']['indices'] + second['preview']['indices'] == list(range(100))
+    assert [row['Transaction ID'] for row in second['preview']['data']] == original['Transaction ID'].iloc[50:100].tolist()
+    last = preview(client, session_id, which='original', offset=len(original) - 3, limit=10)
+    assert len(last['preview']['data']) == 3
+
+
+def test_sort_and_filter_match_pandas(client, session_id, original):
+    page = preview(client, session_id, which='original', sort='Total Spent', order='desc', limit=20)
+    expected = original['Total Spent'].sort_values(ascending=False, kind='stable', na_position='last')
+    assert page['preview']['indices'] == expected.index[:20].tolist()
+
+    missing = original.index[original['Item'].isna()]
+    page = preview(client, session_id, which='original', filter='missing', column='Item', limit=1000)
+    assert page['total_rows'] == len(missing)
+    assert page['preview']['indices'] == missing[:1000].tolist()
+
+
+def test_outlier_filter_rows_carry_their_outlier_cells(client, session_id):
+    page = preview(client, session_id, which='original', filter='outliers', limit=100)
+    assert page['total_rows'] > 0
+    flagged_rows = {row for row, _ in page['outlier_indices']}
+    assert set(page['preview']['indices']) == flagged_rows
+
+
+@pytest.mark.parametrize('query', [{'which': 'both'}, {'filter': 'odd'}, {'sort': 'Nope'}, {'filter': 'missing', 'column': 'Nope'},
+                                   {'offset': 'x'}])
+def test_invalid_queries_are_rejected(client, session_id, query):
+    response = client.get('/preview', query_string=query, headers={'X-Session-ID': session_id})
+    assert response.status_code == 400 and 'error' in response.get_json()
+
+
+def test_select_rows_and_outlier_cells():
+    df = pd.DataFrame({'value': [1.0, 2.0, np.nan, 2.5, 1.5, 100.0, 2.0], 'label': ['b', 3, None, 'a', 'c', 'd', 'e']},
+                      index=list('abcdefg'))
+    profile = DataProfile(df)
+    assert outlier_cells(df, profile) == [['f', 'value']]
+    assert select_rows(df, profile, filter='outliers').tolist() == [5]
+    assert select_rows(df, profile, filter='missing').tolist() == [2]
+    assert select_rows(df, profile, sort='value', descending=True).tolist() == [5, 3, 1, 6, 4, 0, 2]
+    assert select_rows(df, profile, sort='label').tolist() == [1, 3, 0, 4, 5, 6, 2] # Mixed types sort as text
@@ -0,0 +1,66 @@
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.serialization import brotli, compress, dumps, frame_payload
+
+
+def preview_frame():
+    return pd.DataFrame({
+        'price': [1.5, np.nan, 3.0],
+        'quantity': pd.array([1, None, 3], dtype='Int64'),
+        'item': pd.array(['tea', None, 'cake'], dtype=pd.StringDtype('pyarrow')),
+        'category': pd.Categorical(['a', 'b', None]),
+        'flag': [True, False, True],
+        'when': pd.to_datetime(['2023-01-01', None, '2023-03-01']),
+    }, index=[10, 11, 12])
+
+
+def test_dumps_encodes_numpy_pandas_and_non_finite_values():
+    payload = {'n': np.int64(3), 'x': np.float32(0.5), 'nan': float('nan'), 'inf': np.inf, 'na': pd.NA,
+               'nat': pd.NaT, 'when': pd.Timestamp('2023-01-01'), 'array': np.arange(3), 'objects': np.array(['a', None], dtype=object),
+               1: 'non-string key'}
+    assert json.loads(dumps(payload)) == {'n': 3, 'x': 0.5, 'nan': None, 'inf': None, 'na': None, 'nat': None,
+                                          'when': '2023-01-01T00:00:00', 'array': [0, 1, 2], 'objects': ['a', None],
+                                          '1': 'non-string key'}
+    with pytest.raises(TypeError):
+        dumps({'value': object()})
+
+
+def test_frame_payload_orients_agree_with_pandas():
+    df = preview_frame()
+    expected = json.loads(df.to_json(orient='records', date_format='iso'))
+    records = json.loads(dumps(frame_payload(df)))
+    assert records['columns'] == list(df.columns) and records['indices'] == [10, 11, 12]
+    for row, reference in zip(records['data'], expected):
+        assert {col: value for col, value in row.items() if col != 'when'} == {col: value for col, value in reference.items() if col != 'when'}
+    assert [row['when'] for row in records['data']] == ['2023-01-01', None, '2023-03-01']
+    columnar = json.loads(dumps(frame_payload(df, 'columnar')))
+    assert [dict(zip(columnar['columns'], row)) for row in zip(*columnar['arrays'])] == records['data']
+
+
+def test_compress_negotiates_encoding():
+    body = dumps({'values': list(range(1000))})
+    assert compress(body[:100], 'gzip') == (body[:100], None)
+    assert compress(body, None) == (body, None)
+    assert compress(body, 'deflate') == (body, None)
+    compressed, encoding = compress(body, 'gzip;q=1.0, identity')
+    assert encoding == 'gzip' and gzip.decompress(compressed) == body and len(compressed) < len(body)
+    if brotli is not None:
+        compressed, encoding = compress(body, 'gzip, br')
+        assert encoding == 'br' and brotli.decompress(compressed) == body
+
+
+def test_large_responses_are_compressed(client, session_id):
+    headers = {'X-Session-ID': session_id, 'Accept-Encoding': 'gzip'}
+    response = client.get('/preview', query_string={'which': 'original', 'limit': 200}, headers=headers)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert len(json.loads(gzip.decompress(response.data))['preview']['data']) == 200
+    plain = client.get('/preview', query_string={'which': 'original', 'limit': 200, 'format': 'columnar'},
+                       headers={'X-Session-ID': session_id})
+    assert 'Content-Encoding' not in plain.headers
+    assert len(plain.get_json()['preview']['arrays'][0]) == 200
@@ -0,0 +1,133 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.session_store import SessionNotFound, SessionStore
+
+
+class Cleaner:
+    def __init__(self):
+        self.original_data = None
+        self.cleaned_data = None
+        self.dataset_id = None
+        self.cleaning_log = []
+
+
+def frame(seed, n=1000):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'value': rng.normal(size=n), 'label': rng.choice(['a', 'b'], size=n)})
+
+
+def assert_same(df, expected):
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False) # Text comes back as Arrow strings
+
+
+def files(store, session_id):
+    directory = store._session_dir(session_id)
+    return {name: os.stat(os.path.join(directory, name)).st_mtime_ns for name in os.listdir(directory)}
+
+
+@pytest.fixture
+def stores(tmp_path):
+    """Two write-through stores sharing one directory, like two server worker processes."""
+    return (SessionStore(Cleaner, str(tmp_path), write_through=True),
+            SessionStore(Cleaner, str(tmp_path), write_through=True))
+
+
+def test_session_written_by_one_process_is_read_by_another(stores):
+    first, second = stores
+    session_id = first.create()
+    with first.acquire(session_id) as cleaner:
+        cleaner.original_data = cleaner.cleaned_data = frame(0)
+    with second.acquire(session_id) as cleaner:
+        assert_same(cleaner.original_data, frame(0))
+        cleaner.cleaned_data = frame(1)
+    with first.acquire(session_id) as cleaner:
+        assert_same(cleaner.cleaned_data, frame(1))
+    assert not any(name.endswith('.tmp') for name in files(first, session_id))
+
+
+def test_read_only_access_writes_nothing(stores):
+    first, second = stores
+    session_id = first.create()
+    with first.acquire(session_id) as cleaner:
+        cleaner.original_data = cleaner.cleaned_data = frame(0)
+    written = files(first, session_id)
+    for store in (first, second, first):
+        with store.acquire(session_id) as cleaner:
+            cleaner.cleaned_data.head()
+    assert files(first, session_id) == written
+
+
+def test_only_changed_frames_are_written_again(stores):
+    first, _ = stores
+    session_id = first.create()
+    with first.acquire(session_id) as cleaner:
+        cleaner.original_data = cleaner.cleaned_data = frame(0)
+    written = files(first, session_id)
+    with first.acquire(session_id) as cleaner:
+        cleaner.cleaned_data = frame(1)
+    rewritten = files(first, session_id)
+    kept = set(written) & set(rewritten)
+    assert 'state.pkl' in kept and any(name.startswith('original_data.') for name in kept)
+    assert not any(name.startswith('cleaned_data.') for name in kept) # The old file was removed
+    assert sum(name.startswith('cleaned_data.') for name in rewritten) == 1
+
+
+def test_failed_load_is_retried_and_keeps_the_session(stores, monkeypatch):
+    first, second = stores
+    session_id = first.create()
+    with first.acquire(session_id) as cleaner:
+        cleaner.original_data = frame(0)
+    load, failures = SessionStore._load, []
+
+    def flaky_load(self, session_id, session):
+        if len(failures) < 2:
+            failures.append(session_id)
+            raise ValueError('half-written file')
+        return load(self, session_id, session)
+
+    monkeypatch.setattr(SessionStore, '_load', flaky_load)
+    with second.acquire(session_id) as cleaner:
+        assert_same(cleaner.original_data, frame(0))
+    assert len(failures) == 2
+
+    monkeypatch.setattr(SessionStore, '_load', lambda self, session_id, session: (_ for _ in ()).throw(OSError('gone')))
+    fresh = SessionStore(Cleaner, first.spill_dir, write_through=True)
+    with pytest.raises(SessionNotFound):
+        with fresh.acquire(session_id):
+            pass
+    assert session_id in fresh and os.path.exists(first._meta_path(session_id))
+
+
+def test_readers_never_see_a_partial_snapshot_while_another_process_writes(stores):
+    writer, reader = stores
+    session_id = writer.create()
+    with writer.acquire(session_id) as cleaner:
+        cleaner.original_data = cleaner.cleaned_data = frame(0, n=20_000)
+    done, errors = threading.Event(), []
+
+    def write():
+        try:
+            for seed in range(1, 30):
+                with writer.acquire(session_id) as cleaner:
+                    cleaner.cleaned_data = frame(seed, n=20_000)
+        except Exception as e: # pragma: no cover - reported below
+            errors.append(e)
+        finally:
+            done.set()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    while not done.is_set():
+        try:
+            with reader.acquire(session_id) as cleaner:
+                assert len(cleaner.cleaned_data) == 20_000
+        except Exception as e: # pragma: no cover - reported below
+            errors.append(e)
+            break
+    thread.join()
+    assert errors == []
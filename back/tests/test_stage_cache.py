@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_cleaner
+from utils.session_store import frame_memory
+from utils.stage_cache import StageCache, chain_key, fingerprint_frame
+from utils.column_profile import hash_rows
+
+
+def frame(n, seed=0):
+    return pd.DataFrame({'a': np.random.default_rng(seed).normal(size=n)})
+
+
+def test_lru_is_bounded_by_frame_memory():
+    entries = {key: (frame(1000, seed), [key], {}) for seed, key in enumerate('abc')}
+    cache = StageCache(max_bytes=int(frame_memory(entries['a'][0]) * 2.5))
+    cache.put('a', entries['a'])
+    cache.put('b', entries['b'])
+    assert cache.get('a') is entries['a'] # Now most recently used
+    cache.put('c', entries['c'])
+    assert len(cache) == 2 and cache.get('b') is None and cache.get('a') is not None
+    cache.put('big', (frame(10_000), [], {}))
+    assert cache.get('big') is None and len(cache) == 2
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_keys_chain_content_stage_and_options():
+    df = frame(100)
+    root = fingerprint_frame(df, hash_rows(df))
+    assert root == fingerprint_frame(df.copy(), hash_rows(df.copy()))
+    assert root != fingerprint_frame(df.astype('float32'), hash_rows(df))
+    impute = chain_key(root, 'impute', ('mean', None))
+    assert impute == chain_key(root, 'impute', ('mean', None))
+    assert len({impute, chain_key(root, 'impute', ('median', None)), chain_key(root, 'cap', ('mean', None))}) == 3
+
+
+@pytest.fixture
+def cleaner(sample_csv):
+    data_cleaner.stage_cache.clear()
+    cleaner = data_cleaner.AdvancedDataCleaner()
+    assert cleaner.load_data(sample_csv)
+    return cleaner
+
+
+def cached_stages(cleaner):
+    return {timing['stage']: timing['cached'] for timing in cleaner.timings if 'cached' in timing}
+
+
+def test_changing_a_later_option_reuses_earlier_stages(cleaner, sample_csv):
+    options = {'imputationMethod': 'median', 'outlierMethod': 'iqr', 'removeDuplicates': True}
+    cleaner.run_cleaning(options)
+    assert not any(cached_stages(cleaner).values())
+    cleaner.run_cleaning({**options, 'outlierMethod': 'zscore'})
+    assert cached_stages(cleaner) == {'impute': True, 'cap': False, 'round': False, 'dedup': False}
+    cached_result = cleaner.cleaned_data
+
+    data_cleaner.stage_cache.clear()
+    fresh = data_cleaner.AdvancedDataCleaner()
+    assert fresh.load_data(sample_csv)
+    fresh.run_cleaning({**options, 'outlierMethod': 'zscore'})
+    pd.testing.assert_frame_equal(cached_result, fresh.cleaned_data)
+    assert cleaner.stats_after == fresh.stats_after
+
+
+def test_repeated_cleaning_does_not_compound(cleaner):
+    options = {'imputationMethod': 'mean', 'outlierMethod': 'winsorization', 'removeDuplicates': True}
+    summary = cleaner.run_cleaning(options)
+    first = cleaner.cleaned_data
+    assert cleaner.run_cleaning(options) == summary
+    assert cached_stages(cleaner) == {'impute': True, 'cap': True, 'round': True, 'dedup': False} # The sample has no duplicates
+    pd.testing.assert_frame_equal(cleaner.cleaned_data, first)
@@ -0,0 +1,65 @@
+import io
+
+import pandas as pd
+import pytest
+
+from utils.streaming import StreamingDataCleaner
+
+OPTIONS = [
+    {'imputationMethod': 'mean', 'outlierMethod': 'iqr', 'removeDuplicates': True},
+    {'imputationMethod': 'median', 'outlierMethod': 'zscore', 'removeDuplicates': False},
+    {'imputationMethod': 'none', 'outlierMethod': 'winsorization', 'removeDuplicates': True},
+    {'imputationMethod': 'mean', 'outlierMethod': 'none', 'removeDuplicates': True, 'dedupColumns': ['Item', 'Quantity']},
+]
+STAT_KEYS = ('total_rows', 'total_columns', 'missing_values', 'duplicate_rows', 'health_score')
+
+
+@pytest.fixture(scope='module')
+def csv_with_duplicates(tmp_path_factory, sample_csv):
+    df = pd.read_csv(sample_csv)
+    path = tmp_path_factory.mktemp('streaming') / 'sales.csv'
+    pd.concat([df, df.sample(500, random_state=0)], ignore_index=True).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_streaming_matches_in_memory_cleaning(server, csv_with_duplicates, tmp_path, options):
+    streaming = StreamingDataCleaner(chunksize=1000)
+    assert streaming.load_data(csv_with_duplicates)
+    output_path = tmp_path / 'cleaned.csv'
+    streaming.run_cleaning(options, str(output_path))
+
+    cleaner = server.AdvancedDataCleaner()
+    assert cleaner.load_data(csv_with_duplicates)
+    cleaner.run_cleaning(options)
+
+    expected = pd.read_csv(io.StringIO(cleaner.cleaned_data.to_csv(index=False)))
+    pd.testing.assert_frame_equal(pd.read_csv(output_path), expected)
+    for stats, reference in ((streaming.stats_before, cleaner.stats_before), (streaming.stats_after, cleaner.stats_after)):
+        assert {key: stats[key] for key in STAT_KEYS} == {key: reference[key] for key in STAT_KEYS}
+
+
+def drifting_csv(path, mixed=False):
+    """20 rows, row 16 repeating row 6, where a blank (or text) cell makes the second chunk of 10
+    parse Quantity as float64 (or object) while the first parses it as int64."""
+    df = pd.DataFrame({'Item': ['Tea', 'Cake'] * 10, 'Quantity': range(20), 'Price': [2.5] * 20}, dtype=object)
+    df.loc[16] = df.loc[6]
+    df.loc[12, 'Quantity'] = 'three' if mixed else None
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize('mixed', [False, True])
+def test_duplicates_across_chunks_with_dtype_drift(server, tmp_path, mixed):
+    path = drifting_csv(tmp_path / 'drift.csv', mixed)
+    options = {'imputationMethod': 'none', 'outlierMethod': 'none', 'removeDuplicates': True}
+    streaming = StreamingDataCleaner(chunksize=10)
+    assert streaming.load_data(path)
+    summary = streaming.run_cleaning(options, str(tmp_path / 'cleaned.csv'))
+
+    cleaner = server.AdvancedDataCleaner()
+    assert cleaner.load_data(path)
+    assert summary == cleaner.run_cleaning(options)
+    assert streaming.stats_before['duplicate_rows'] == cleaner.stats_before['duplicate_rows'] == 1
+    for stats, reference in ((streaming.stats_before, cleaner.stats_before), (streaming.stats_after, cleaner.stats_after)):
+        assert {key: stats[key] for key in STAT_KEYS} == {key: reference[key] for key in STAT_KEYS}
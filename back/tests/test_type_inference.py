@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from utils.type_inference import coerce_numeric_columns, infer_schema, missing_token_variants, normalize_missing_values
+
+TOKENS = {'', 'na', 'n/a', 'nan', 'null', 'none', 'unknown', 'error'}
+
+
+def reference_normalize(df):
+    """Per-cell token check, as the loader did before factorizing."""
+    df = df.copy()
+    for col in df.select_dtypes(include=['object']).columns:
+        df[col] = df[col].map(lambda v: np.nan if pd.notna(v) and str(v).strip().lower() in TOKENS else v)
+    return df
+
+
+def reference_coerce(df, threshold=0.6):
+    """Parses every cell and converts columns where enough of the non-null values parse."""
+    df = df.copy()
+    for col in df.select_dtypes(include=['object']).columns:
+        parsed = pd.to_numeric(df[col], errors='coerce')
+        non_null = df[col].notna().sum()
+        if non_null and parsed.notna().sum() / non_null >= threshold:
+            df[col] = parsed
+    return df
+
+
+def dirty_frame(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'quantity': rng.choice(['1', '2', '3', ' NA ', 'ERROR', 'Unknown', None, '4.5'], n),
+        'item': rng.choice(['Coffee', 'Tea', 'n/a', 'NULL', ''], n),
+        'mostly_text': rng.choice(['a', 'b', 'c', '1'], n),
+        'ints': rng.integers(0, 100, n).astype(str),
+        'numbers': rng.normal(size=n),
+    })
+    return frame.astype({'quantity': object, 'item': object, 'mostly_text': object, 'ints': object})
+
+
+def test_normalize_matches_per_cell_reference():
+    df = dirty_frame()
+    expected = reference_normalize(df)
+    assert normalize_missing_values(df, TOKENS)
+    pd.testing.assert_frame_equal(df, expected)
+    assert not normalize_missing_values(df, TOKENS)
+
+
+def test_coerce_matches_parsing_every_cell():
+    df = dirty_frame()
+    normalize_missing_values(df, TOKENS)
+    expected = reference_coerce(df)
+    assert coerce_numeric_columns(df, sample_size=100)
+    pd.testing.assert_frame_equal(df, expected)
+    assert df['ints'].dtype == np.int64 and df['quantity'].dtype == float
+    assert df['mostly_text'].dtype == object and df['item'].dtype == object
+
+
+def test_token_variants_and_schema():
+    assert missing_token_variants({'n/a', 'null'}) == ['N/A', 'NULL', 'Null', 'n/a', 'null']
+    df = pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']})
+    assert infer_schema(df) == {'dtypes': {'a': 'int64', 'b': 'object'}, 'numeric_columns': ['a']}
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.visualization import build_visualizations, downsample_series, lttb_indices, minmax_indices, top_k_counts
+
+
+@pytest.mark.parametrize('n', [501, 1001, 1999, 12_345])
+def test_minmax_keeps_each_bucket_extremes_when_buckets_do_not_divide_rows(n):
+    y = np.random.default_rng(n).normal(size=n)
+    kept = minmax_indices(y, 500)
+    size = -(-n // 250)
+    expected = set()
+    for start in range(0, n, size):
+        bucket = y[start:start + size]
+        expected |= {start + int(bucket.argmin()), start + int(bucket.argmax())}
+    assert kept.tolist() == sorted(expected)
+    assert len(kept) <= 500
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    y = np.zeros(10_000)
+    y[4321] = 100.0
+    kept = lttb_indices(np.arange(len(y), dtype=float), y, 200)
+    assert len(kept) == 200
+    assert kept[0] == 0 and kept[-1] == len(y) - 1 and 4321 in kept
+
+
+def test_downsample_series_uses_index_labels_and_skips_missing_values():
+    series = pd.Series([1.0, np.nan, 3.0, 2.0, np.nan], index=[10, 11, 12, 13, 14])
+    x, y, total = downsample_series(series, max_points=10)
+    assert x.tolist() == [10, 12, 13] and y.tolist() == [1.0, 3.0, 2.0] and total == 3
+    assert downsample_series(pd.Series([5.0, 5.0, np.nan])) is None
+
+
+def test_top_k_counts_are_exact_for_short_columns_and_scaled_for_long_ones():
+    series = pd.Series(['a'] * 6 + ['b'] * 3 + ['c'] + [None])
+    assert top_k_counts(series, k=2) == (['a', 'b'], [6, 3], False)
+    names, counts, approximate = top_k_counts(series, exact_limit=5, sample_size=10_000)
+    assert approximate and names == ['a', 'b', 'c'] and abs(counts[0] - 6) <= 1
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_build_visualizations_payload(method):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'value': rng.normal(size=1001), 'item': rng.choice(['tea', 'cake'], size=1001)})
+    charts = {chart['column']: chart for chart in build_visualizations(df, max_points=100, method=method)}
+    assert charts['item']['type'] == 'bar' and sum(charts['item']['values']) == 1001
+    assert charts['value']['type'] == 'scatter' and charts['value']['total'] == 1001
+    assert len(charts['value']['x']) == len(charts['value']['y']) <= 100
@@ -0,0 +1,82 @@
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from .column_profile import mad_bounds
+
+CAP_METHODS = ('iqr', 'zscore', 'winsorization')
+WINSOR_LIMITS = (0.05, 0.05)
+PARALLEL_MIN_COLUMNS = 64 # Narrower blocks are capped in one call
+
+
+def winsor_bounds(block, limits=WINSOR_LIMITS):
+    """Per-column bounds matching `scipy.stats.mstats.winsorize` on each column's non-null values.
+
+    Values ranked in the lowest `int(low * n)` are raised to the next value and values ranked in the
+    highest `int(high * n)` lowered to the previous one, i.e. a clip to two order statistics.
+    """
+    n_rows, n_cols = block.shape
+    counts = (~np.isnan(block)).sum(axis=0)
+    low = (limits[0] * counts).astype(int)
+    high = counts - (limits[1] * counts).astype(int) - 1
+    lower, upper = np.full(n_cols, np.nan), np.full(n_cols, np.nan)
+    present = counts > 0
+    if not present.any():
+        return lower, upper
+    cols = np.flatnonzero(present)
+    if (counts[cols] == n_rows).all():
+        # No missing values: one partition of the whole block finds every order statistic needed
+        ordered = np.partition(block[:, cols], np.unique(np.concatenate([low[cols], high[cols]])), axis=0)
+        lower[cols] = ordered[low[cols], np.arange(len(cols))]
+        upper[cols] = ordered[high[cols], np.arange(len(cols))]
+        return lower, upper
+    # Ranks count non-null values only, so each column is partitioned on its own values (O(n), no sort)
+    for col, values in zip(cols, np.ascontiguousarray(block[:, cols].T)):
+        values = np.partition(values[~np.isnan(values)], [low[col], high[col]])
+        lower[col], upper[col] = values[low[col]], values[high[col]]
+    return lower, upper
+
+
+def zscore_bounds(block, threshold=3):
+    """Per-column mean +/- `threshold` sample standard deviations (NaN when undefined)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(block, axis=0)
+        std = np.nanstd(block, axis=0, ddof=1)
+    return mean - threshold * std, mean + threshold * std
+
+
+def capping_bounds(block, method, limits=WINSOR_LIMITS):
+    """(lower, upper) arrays for a 2-D float block; NaN means the column is left unbounded on that side."""
+    if method == 'iqr':
+        return mad_bounds(block)
+    if method == 'zscore':
+        return zscore_bounds(block)
+    if method == 'winsorization':
+        return winsor_bounds(block, limits)
+    raise ValueError(f'Unknown capping method: {method}')
+
+
+def _cap_group(block, method, limits=WINSOR_LIMITS):
+    lower, upper = capping_bounds(block, method, limits)
+    return np.clip(block, np.where(np.isnan(lower), -np.inf, lower), np.where(np.isnan(upper), np.inf, upper))
+
+
+def cap_block(block, method, n_jobs=1, backend='thread', min_columns=PARALLEL_MIN_COLUMNS, limits=WINSOR_LIMITS):
+    """Caps every column of a 2-D float block at once: bounds per column, then one broadcast `np.clip`.
+
+    With `n_jobs` > 1 and at least `min_columns` columns, the block is split into column groups
+    capped concurrently. Threads suit most cases since NumPy's sorts, medians and clip release the
+    GIL; `backend='process'` uses a process pool instead. Returns the capped block.
+    """
+    n_jobs = n_jobs if n_jobs and n_jobs > 0 else (os.cpu_count() or 1)
+    n_cols = block.shape[1]
+    if n_jobs == 1 or n_cols < max(min_columns, 2):
+        return _cap_group(block, method, limits)
+    groups = [group for group in np.array_split(np.arange(n_cols), min(n_jobs, n_cols)) if len(group)]
+    executor_class = ProcessPoolExecutor if backend == 'process' else ThreadPoolExecutor
+    with executor_class(max_workers=len(groups)) as executor:
+        capped = list(executor.map(_cap_group, [block[:, group] for group in groups], [method] * len(groups), [limits] * len(groups)))
+    return np.concatenate(capped, axis=1)
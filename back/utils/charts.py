@@ -0,0 +1,117 @@
+import io
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.stats import gaussian_kde
+
+SAMPLE_SIZE = 50_000
+KDE_POINTS = 200
+RENDER_VERSION = '1' # Bump when the chart appearance changes so cached images are not reused
+
+
+def summarize_distribution(values, sample_size=SAMPLE_SIZE, random_state=0):
+    """Bins a numeric column for plotting: histogram over all values, KDE over a bounded sample."""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    sample = values
+    if len(values) > sample_size:
+        sample = np.random.default_rng(random_state).choice(values, sample_size, replace=False)
+    edges = np.histogram_bin_edges(sample, bins='auto')
+    if len(edges) > 101:
+        edges = np.histogram_bin_edges(sample, bins=100)
+    counts, edges = np.histogram(values, bins=edges)
+    summary = {'edges': edges, 'counts': counts, 'kde_x': None, 'kde_y': None}
+    if len(sample) > 1 and np.ptp(sample) > 0:
+        kde_x = np.linspace(edges[0], edges[-1], KDE_POINTS)
+        density = gaussian_kde(sample)(kde_x)
+        summary['kde_x'], summary['kde_y'] = kde_x, density * len(values) * np.diff(edges).mean()
+    return summary
+
+
+def render_distribution_png(column, summary):
+    """Renders one column's histogram + KDE to PNG bytes. Runs in a worker process."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.style.use('dark_background')
+    fig, ax = plt.subplots(figsize=(8, 4))
+    fig.patch.set_facecolor('#111827')
+    edges, counts = summary['edges'], summary['counts']
+    sns.histplot(x=edges[:-1], weights=counts, bins=edges, ax=ax, color="cyan")
+    if summary['kde_x'] is not None:
+        ax.plot(summary['kde_x'], summary['kde_y'], color="cyan")
+    ax.set_title(f'Distribution of {column}', color='white')
+    ax.set_xlabel(column)
+    ax.tick_params(colors='white')
+    plt.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=100, facecolor='#111827')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+class ChartRenderer:
+    """Renders per-column distribution charts in a process pool and caches the PNG bytes.
+
+    Charts are keyed by dataset fingerprint and column, so repeated reports for the same cleaned
+    data reuse them. Only binned summaries are sent to the workers, never the raw column. The pool
+    belongs to the process that started it: a forked server worker starts its own, and inside a
+    multiprocessing child such as a job worker charts render serially.
+    """
+    def __init__(self, max_workers=None, max_entries=256):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+
+    def _get_executor(self):
+        """The process pool of the current process, or None when charts should render serially."""
+        if multiprocessing.parent_process() is not None:
+            return None # A nested pool would keep the worker from exiting; job workers already run in parallel
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                # An executor inherited through fork has no management thread and would never run work
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def render(self, df, columns, fingerprint):
+        """Returns PNG bytes for each column, in order."""
+        keys = [(fingerprint, col, RENDER_VERSION) for col in columns]
+        images = {}
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    images[key] = self._cache[key]
+        missing = [key for key in keys if key not in images]
+        if missing:
+            jobs = [(key[1], summarize_distribution(df[key[1]].to_numpy(dtype=float, na_value=np.nan))) for key in missing]
+            executor = self._get_executor() if self.max_workers > 1 and len(jobs) > 1 else None
+            if executor is not None:
+                rendered = list(executor.map(render_distribution_png, *zip(*jobs)))
+            else:
+                rendered = [render_distribution_png(col, summary) for col, summary in jobs]
+            with self._lock:
+                for key, png in zip(missing, rendered):
+                    images[key] = self._cache[key] = png
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return [images[key] for key in keys]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def shutdown(self):
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown()
+        self._executor = None
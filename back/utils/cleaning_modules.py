@@ -1,36 +1,54 @@
 import pandas as pd
 import numpy as np
-from sklearn.impute import KNNImputer
-from scipy import stats
+import warnings
+from .knn_imputation import FastKNNImputer
+from .column_profile import numeric_block
+from .capping import cap_block
 
-def impute_missing(df, method="mean"):
+def impute_missing(df, method="mean", knn_search="exact"):
     if method == "mean":
         return df.fillna(df.mean())
     elif method == "median":
         return df.fillna(df.median())
     elif method == "knn":
-        imputer = KNNImputer()
-        df_imputed = pd.DataFrame(imputer.fit_transform(df), columns=df.columns)
+        imputer = FastKNNImputer(search=knn_search)
+        df_imputed = pd.DataFrame(imputer.fit_transform(df), index=df.index, columns=df.columns)
         return df_imputed
     return df
 
 def detect_outliers(df, method="zscore", threshold=3):
     outlier_mask = pd.DataFrame(False, index=df.index, columns=df.columns)
-    for col in df.select_dtypes(include=np.number).columns:
+    numeric_cols = df.select_dtypes(include=np.number).columns
+    block = numeric_block(df, numeric_cols)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
         if method == "zscore":
-            outlier_mask[col] = np.abs(stats.zscore(df[col].fillna(df[col].mean()))) > threshold
+            # Same as stats.zscore on each column with missing values filled by the column mean
+            mean = np.nanmean(block, axis=0)
+            filled = np.where(np.isnan(block), mean, block)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mask = np.abs((filled - mean) / filled.std(axis=0)) > threshold
         elif method == "iqr":
-            Q1 = df[col].quantile(0.25)
-            Q3 = df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            outlier_mask[col] = ((df[col] < Q1 - 1.5*IQR) | (df[col] > Q3 + 1.5*IQR))
+            q1, q3 = np.nanpercentile(block, [25, 75], axis=0)
+            iqr = q3 - q1
+            with np.errstate(invalid="ignore"):
+                mask = (block < q1 - 1.5*iqr) | (block > q3 + 1.5*iqr)
+        else:
+            return outlier_mask
+    outlier_mask[numeric_cols] = mask
     return outlier_mask
 
-def winsorize(df, limits=(0.05,0.05)):
-    from scipy.stats.mstats import winsorize as w
+def winsorize(df, limits=(0.05,0.05), n_jobs=1):
     df_w = df.copy()
-    for col in df.select_dtypes(include=np.number).columns:
-        df_w[col] = w(df[col].fillna(df[col].mean()), limits=limits)
+    numeric_cols = df.select_dtypes(include=np.number).columns
+    block = numeric_block(df, numeric_cols)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        block = np.where(np.isnan(block), np.nanmean(block, axis=0), block)
+    block = cap_block(block, "winsorization", n_jobs=n_jobs, limits=limits)
+    for j, col in enumerate(numeric_cols):
+        # Bounds are values of the column itself, so integer columns keep their dtype
+        df_w[col] = block[:, j].astype(df[col].dtype) if pd.api.types.is_integer_dtype(df[col].dtype) else block[:, j]
     return df_w
 
 def apply_weights(df, weights_col):
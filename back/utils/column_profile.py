@@ -0,0 +1,78 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+MAD_MULTIPLIER = 2.5
+QUANTILES = (5, 25, 50, 75, 95)
+
+
+def hash_rows(df):
+    """Returns one uint64 hash per row, independent of the index."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def numeric_block(df, columns):
+    """Returns the given columns as one 2-D float array with NaN for missing values."""
+    if len(columns) == 0:
+        return np.empty((len(df), 0))
+    return df[columns].to_numpy(dtype=float, na_value=np.nan)
+
+
+def mad_bounds(block):
+    """Vectorized MAD outlier bounds per column of a 2-D array.
+
+    Columns with fewer than three values or zero MAD get NaN bounds, meaning "no outliers".
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        median = np.nanmedian(block, axis=0)
+        mad = np.nanmedian(np.abs(block - median), axis=0)
+    counts = (~np.isnan(block)).sum(axis=0)
+    usable = (counts >= 3) & (mad > 0)
+    spread = MAD_MULTIPLIER * mad / 0.6745
+    return np.where(usable, median - spread, np.nan), np.where(usable, median + spread, np.nan)
+
+
+class DataProfile:
+    """Per-column statistics of a DataFrame, computed in a single vectorized pass.
+
+    Null counts and row hashes cover every column (pass `row_hashes` when they are already known); count, mean, std, median, MAD, quantiles and
+    MAD outlier bounds/counts are nan-aware reductions over the 2-D block of numeric columns.
+    """
+    def __init__(self, df, row_hashes=None):
+        self.n_rows, self.n_columns = df.shape
+        self.size = df.size
+        self.null_counts = df.isnull().sum()
+        self.missing_values = int(self.null_counts.sum())
+        self.row_hashes = hash_rows(df) if row_hashes is None else row_hashes
+        self.duplicate_rows = int(self.n_rows - len(np.unique(self.row_hashes)))
+        self.numeric_cols = df.select_dtypes(include=np.number).columns
+
+        block = numeric_block(df, self.numeric_cols)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            count = (~np.isnan(block)).sum(axis=0)
+            median = np.nanmedian(block, axis=0)
+            mad = np.nanmedian(np.abs(block - median), axis=0)
+            stats = {
+                'count': count,
+                'mean': np.nanmean(block, axis=0),
+                'std': np.where(count > 1, np.nanstd(block, axis=0, ddof=1), np.nan),
+                'median': median,
+                'mad': mad,
+            }
+            for q, values in zip(QUANTILES, np.nanpercentile(block, QUANTILES, axis=0)):
+                stats[f'q{q:02d}'] = values
+        lower, upper = mad_bounds(block)
+        with np.errstate(invalid='ignore'):
+            stats['mad_outliers'] = ((block < lower) | (block > upper)).sum(axis=0)
+        stats['mad_lower'], stats['mad_upper'] = lower, upper
+        self.numeric = pd.DataFrame(stats, index=self.numeric_cols)
+
+    def health_score(self):
+        """Weighted completeness (70%) and uniqueness (30%) score, as a percentage."""
+        if self.size == 0: return 0
+        completeness = 1 - (self.missing_values / (self.size or 1))
+        uniqueness = 1 - (self.duplicate_rows / (self.n_rows or 1))
+        return round(((completeness * 0.7) + (uniqueness * 0.3)) * 100, 2)
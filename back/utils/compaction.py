@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype, is_float_dtype, is_integer_dtype, is_object_dtype
+
+from .session_store import frame_memory
+
+CATEGORY_MAX_RATIO = 0.5 # Text columns with at most this many distinct values per non-null value become categoricals
+ARROW_STRING = pd.StringDtype('pyarrow')
+
+
+def _is_text(series):
+    """True for object or string columns whose non-null values are all strings."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.StringDtype):
+        return True
+    return is_object_dtype(dtype) and infer_dtype(series, skipna=True) == 'string'
+
+
+def compact_column(series, category_ratio=CATEGORY_MAX_RATIO, downcast_floats=False):
+    """Returns the column in its most compact lossless dtype, or None when it is already compact.
+
+    Text becomes a categorical when it repeats enough, Arrow-backed strings otherwise; integers are
+    downcast to the smallest type that holds them; floats become float32 only with
+    `downcast_floats` and when every value survives the round trip exactly.
+    """
+    dtype = series.dtype
+    if _is_text(series):
+        codes, uniques = pd.factorize(series)
+        non_null = int((codes >= 0).sum())
+        if non_null == 0:
+            return None
+        if len(uniques) <= category_ratio * non_null:
+            categories = pd.Index(uniques, dtype=object)
+            return pd.Series(pd.Categorical.from_codes(codes, categories), index=series.index, name=series.name)
+        if dtype == ARROW_STRING:
+            return None
+        return series.astype(ARROW_STRING)
+    if is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        compact = pd.to_numeric(series, downcast='unsigned' if dtype.kind == 'u' else 'integer')
+        return compact if compact.dtype != dtype else None
+    if downcast_floats and is_float_dtype(dtype) and dtype == np.float64:
+        values = series.to_numpy()
+        narrowed = values.astype(np.float32)
+        if np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+            return pd.Series(narrowed, index=series.index, name=series.name)
+    return None
+
+
+def compact_frame(df, category_ratio=CATEGORY_MAX_RATIO, downcast_floats=False):
+    """Converts columns of `df` in place to compact dtypes. Returns a memory report.
+
+    The report has the deep memory before and after in MB and the dtype change of every converted
+    column.
+    """
+    before = frame_memory(df)
+    conversions = {}
+    for col in df.columns:
+        compact = compact_column(df[col], category_ratio, downcast_floats)
+        if compact is not None:
+            conversions[str(col)] = f'{df[col].dtype} -> {compact.dtype}'
+            df[col] = compact
+    return {
+        'memory_before_mb': round(before / 1024 ** 2, 3),
+        'memory_after_mb': round(frame_memory(df) / 1024 ** 2, 3),
+        'conversions': conversions
+    }
@@ -9,7 +9,7 @@ def process_data(file_path, config):
         df = pd.read_excel(file_path)
     
     # Apply missing value imputation
-    df = impute_missing(df, config.get("missing_method", "mean"))
+    df = impute_missing(df, config.get("missing_method", "mean"), config.get("knn_search", "exact"))
     
     # Handle outliers
     outliers = detect_outliers(df, config.get("outlier_method", "zscore"))
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+
+# Bump when parsing/normalization changes so stale columnar copies are not reused.
+FORMAT_VERSION = '3'
+METADATA_KEY = b'datacleaner' # Schema metadata entry holding the JSON passed to `put`
+ARROW_STRING_TYPES = {pa.string(): pd.StringDtype('pyarrow')}.get # Text comes back Arrow-backed, not as Python str objects
+
+
+class DatasetStore:
+    """Content-addressed store of parsed datasets as memory-mapped Arrow IPC files.
+
+    Each upload is parsed once and saved under the SHA-256 of its bytes; later loads of the same
+    content skip parsing and read straight from the memory map, selecting only the columns and row
+    range they need. The least recently used files are pruned once the store exceeds `max_bytes`.
+    """
+    def __init__(self, root, max_bytes=5 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def digest_file(self, file_path, variant='', block_size=1024 * 1024):
+        """Returns the dataset ID for a file: a hash of its bytes, extension and format version.
+
+        `variant` names load settings that change the stored frame (e.g. dtype compaction), so each
+        setting gets its own copy.
+        """
+        h = hashlib.sha256(f'{FORMAT_VERSION}:{variant}:{file_path.rsplit(".", 1)[-1].lower()}:'.encode())
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                h.update(block)
+        return h.hexdigest()
+
+    def _path(self, dataset_id):
+        return os.path.join(self.root, f'{dataset_id}.arrow')
+
+    def has(self, dataset_id):
+        return dataset_id is not None and os.path.exists(self._path(dataset_id))
+
+    def put(self, dataset_id, df, metadata=None):
+        """Writes the DataFrame as an uncompressed Arrow IPC file. Returns False if Arrow cannot represent it.
+
+        `metadata`, a JSON-serializable dict, is kept in the file's schema and returned by `metadata()`.
+        """
+        path = self._path(dataset_id)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            table = pa.Table.from_pandas(df)
+            if metadata:
+                table = table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: json.dumps(metadata).encode()})
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+        except (pa.ArrowException, ValueError, TypeError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        self.prune()
+        return True
+
+    def link(self, dataset_id, dest):
+        """Hard-links a dataset's file to `dest` so that it survives pruning. Returns False if the
+        dataset is gone or the filesystem cannot link it."""
+        tmp_path = f'{dest}.{threading.get_ident()}.tmp'
+        try:
+            os.link(self._path(dataset_id), tmp_path)
+            os.replace(tmp_path, dest)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        return True
+
+    def read_table(self, dataset_id, columns=None, offset=0, length=None):
+        """Returns a zero-copy Arrow table over the requested columns and row range."""
+        path = self._path(dataset_id)
+        os.utime(path) # Mark as recently used for pruning
+        return read_arrow_table(path, columns, offset, length)
+
+    def read(self, dataset_id, columns=None, offset=0, length=None):
+        """Reads the requested columns and row range into a DataFrame."""
+        path = self._path(dataset_id)
+        os.utime(path)
+        return read_arrow(path, columns, offset, length)
+
+    def metadata(self, dataset_id):
+        """The metadata dict saved with a dataset by `put`, or {}."""
+        schema = pa.ipc.open_file(pa.memory_map(self._path(dataset_id), 'r')).schema
+        raw = (schema.metadata or {}).get(METADATA_KEY)
+        return json.loads(raw) if raw else {}
+
+    def num_rows(self, dataset_id):
+        return self.read_table(dataset_id, columns=[]).num_rows
+
+    def prune(self):
+        with self._lock:
+            files = [os.path.join(self.root, name) for name in os.listdir(self.root) if name.endswith('.arrow')]
+            files.sort(key=os.path.getmtime)
+            total = sum(os.path.getsize(path) for path in files)
+            for path in files:
+                if total <= self.max_bytes:
+                    break
+                total -= os.path.getsize(path)
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass # Still memory-mapped by a reader on some platforms
+
+
+def read_arrow_table(path, columns=None, offset=0, length=None):
+    """Memory-maps an Arrow IPC file and returns a zero-copy table over the requested columns and rows."""
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    if columns is not None:
+        table = table.select(list(columns))
+    if offset or length is not None:
+        table = table.slice(offset, length)
+    return table
+
+
+def read_arrow(path, columns=None, offset=0, length=None):
+    """Reads the requested columns and row range of an Arrow IPC file into a DataFrame."""
+    df = read_arrow_table(path, columns, offset, length).to_pandas(types_mapper=ARROW_STRING_TYPES)
+    if offset:
+        df.index = df.index + offset
+    return df
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from .column_profile import hash_rows
+
+DEDUP_MODES = ('exact', 'fuzzy')
+FUZZY_THRESHOLD = 0.8
+FUZZY_PRECISION = 2
+MINHASH_BANDS = 8
+MINHASH_ROWS_PER_BAND = 4
+
+
+class RowHashSet:
+    """Set of row hashes seen so far, used for out-of-core duplicate detection.
+
+    Hashes are kept in sorted runs like a log-structured merge tree: each chunk's new hashes become
+    one run, and the newest runs are merged while a run is not more than twice the size of the one
+    after it. There are at most log2(n) runs and every hash is merged O(log n) times, so recording
+    n hashes costs O(n log n) in total instead of re-sorting the whole set for every chunk.
+    """
+    def __init__(self):
+        self._runs = [] # Disjoint sorted uint64 arrays, largest (oldest) first
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    def _contains(self, values):
+        found = np.zeros(len(values), dtype=bool)
+        for run in self._runs:
+            pos = np.minimum(np.searchsorted(run, values), len(run) - 1)
+            found |= run[pos] == values
+        return found
+
+    def first_seen(self, hashes):
+        """Returns a mask of rows seen for the first time and records them."""
+        uniq, first_idx = np.unique(hashes, return_index=True)
+        fresh = ~self._contains(uniq)
+        mask = np.zeros(len(hashes), dtype=bool)
+        mask[first_idx[fresh]] = True
+        if fresh.any():
+            self._runs.append(uniq[fresh])
+            while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+                newest = self._runs.pop()
+                merged = np.concatenate([self._runs.pop(), newest])
+                merged.sort(kind='stable') # Radix sort for integers
+                self._runs.append(merged)
+        return mask
+
+
+def key_hashes(df, columns=None):
+    """One hash per row over `columns` (all columns by default)."""
+    return hash_rows(df if columns is None else df[list(columns)])
+
+
+def first_occurrence(hashes):
+    """Mask keeping the first row of every group of equal hashes, like `duplicated(keep='first')` negated."""
+    keep = np.zeros(len(hashes), dtype=bool)
+    keep[np.unique(hashes, return_index=True)[1]] = True
+    return keep
+
+
+def normalize_for_matching(df, columns=None, precision=FUZZY_PRECISION):
+    """Copy of the key columns with text lower-cased and whitespace collapsed, and numbers rounded.
+
+    Text is normalized once per distinct value through factorized codes.
+    """
+    columns = list(df.columns if columns is None else columns)
+    normalized = {}
+    for col in columns:
+        series = df[col]
+        if is_numeric_dtype(series.dtype):
+            normalized[col] = series.to_numpy(dtype=float, na_value=np.nan).round(precision)
+            continue
+        codes, uniques = pd.factorize(series)
+        cleaned = pd.Index(uniques).astype(str).str.lower().str.strip().str.replace(r'\s+', ' ', regex=True)
+        normalized[col] = np.append(cleaned.to_numpy(dtype=object), None)[codes]
+    return pd.DataFrame(normalized, index=df.index)
+
+
+def _mix(x):
+    """splitmix64 finalizer: a cheap, well-distributed permutation of uint64 values."""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _cell_hashes(normalized):
+    """(rows x columns) uint64 array hashing each (column, value) token."""
+    cells = np.empty(normalized.shape, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for j, col in enumerate(normalized.columns):
+            cells[:, j] = _mix(pd.util.hash_array(normalized[col].to_numpy()) ^ np.uint64(j + 1))
+    return cells
+
+
+def near_duplicate_groups(df, columns=None, threshold=FUZZY_THRESHOLD, precision=FUZZY_PRECISION,
+                          bands=MINHASH_BANDS, rows_per_band=MINHASH_ROWS_PER_BAND, seed=0):
+    """Groups rows whose normalized values mostly agree. Returns one group label per row.
+
+    Each row is the set of its (column, normalized value) tokens. MinHash signatures are split into
+    `bands` LSH bands; rows sharing a band bucket are compared only with the bucket's first row, and
+    pairs whose token Jaccard similarity reaches `threshold` are linked. Linked rows form the groups.
+    Work is linear in the number of rows, never pairwise.
+    """
+    n = len(df)
+    if n == 0:
+        return np.empty(0, dtype=int)
+    cells = _cell_hashes(normalize_for_matching(df, columns, precision))
+    n_columns = cells.shape[1]
+    seeds = np.random.default_rng(seed).integers(1, 2 ** 63, bands * rows_per_band, dtype=np.uint64)
+    sources, targets = [], []
+    with np.errstate(over='ignore'):
+        for band in range(bands):
+            key = np.zeros(n, dtype=np.uint64)
+            for s in seeds[band * rows_per_band:(band + 1) * rows_per_band]:
+                key = _mix(key ^ _mix(cells ^ s).min(axis=1))
+            order = np.argsort(key, kind='stable')
+            sorted_key = key[order]
+            starts = np.flatnonzero(np.r_[True, sorted_key[1:] != sorted_key[:-1]])
+            rep = np.empty(n, dtype=np.int64)
+            rep[order] = order[np.repeat(starts, np.diff(np.r_[starts, n]))]
+            candidates = np.flatnonzero(rep != np.arange(n))
+            if len(candidates) == 0:
+                continue
+            matches = (cells[candidates] == cells[rep[candidates]]).sum(axis=1)
+            similar = matches / (2 * n_columns - matches) >= threshold
+            sources.append(candidates[similar])
+            targets.append(rep[candidates[similar]])
+    if not sources:
+        return np.arange(n)
+    sources, targets = np.concatenate(sources), np.concatenate(targets)
+    graph = coo_matrix((np.ones(len(sources), dtype=bool), (sources, targets)), shape=(n, n))
+    return connected_components(graph, directed=False)[1]
+
+
+def duplicate_mask(df, columns=None, mode='exact', threshold=FUZZY_THRESHOLD, precision=FUZZY_PRECISION, row_hashes=None):
+    """Mask of rows to keep: the first row of each exact (or, with mode='fuzzy', near-) duplicate group.
+
+    `row_hashes` can pass precomputed full-row hashes (e.g. from a DataProfile) for exact mode.
+    """
+    if mode == 'fuzzy':
+        return first_occurrence(near_duplicate_groups(df, columns, threshold, precision))
+    if row_hashes is None or columns is not None:
+        row_hashes = key_hashes(df, columns)
+    return first_occurrence(row_hashes)
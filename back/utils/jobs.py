@@ -0,0 +1,198 @@
+import json
+import os
+import pickle
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled."""
+
+
+def _write_atomic(path, data):
+    tmp_path = f'{path}.{uuid.uuid4().hex[:12]}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, 'rb') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class JobProgress:
+    """Progress reporter handed to job functions; also the cooperative cancellation point."""
+    def __init__(self, job_id, state_dir):
+        self.job_id = job_id
+        self.state_dir = state_dir
+
+    def __call__(self, fraction, message=None):
+        if os.path.exists(os.path.join(self.state_dir, f'{self.job_id}.cancel')):
+            raise JobCancelled(self.job_id)
+        _write_atomic(os.path.join(self.state_dir, f'{self.job_id}.progress'), json.dumps([float(fraction), message]).encode())
+
+
+def _run_job(fn, job_id, state_dir, args, kwargs):
+    progress = JobProgress(job_id, state_dir)
+    progress(0.0, 'started')
+    result = fn(*args, progress=progress, **kwargs)
+    progress(1.0, 'finished')
+    return result
+
+
+class Job:
+    def __init__(self, job_id, kind, owner, status=QUEUED, error=None, submitted_at=None, finished_at=None):
+        self.id = job_id
+        self.kind = kind
+        self.owner = owner
+        self.status = status
+        self.error = error
+        self.submitted_at = submitted_at or time.time()
+        self.finished_at = finished_at
+
+    def record(self):
+        return {'job_id': self.id, 'kind': self.kind, 'owner': self.owner, 'status': self.status,
+                'error': self.error, 'submitted_at': self.submitted_at, 'finished_at': self.finished_at}
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(record['job_id'], record['kind'], record['owner'], record['status'], record['error'],
+                   record['submitted_at'], record['finished_at'])
+
+    def to_dict(self, progress=None):
+        fraction, message = progress or (1.0 if self.status == DONE else 0.0, None)
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': round(fraction, 3),
+            'message': message,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobManager:
+    """Runs long cleaning/report work in a local process pool and tracks it by job ID.
+
+    Job records, progress, cancellation flags and results live as files in `state_dir`, so any
+    server process sharing that directory can report on, cancel or return the result of a job that
+    another process accepted; only the accepting process runs it. Job functions must be picklable
+    module-level callables accepting a `progress` keyword; calling `progress(fraction, message)`
+    publishes progress and raises `JobCancelled` once the job has been cancelled. `on_done(job,
+    result)` runs in the accepting process after success and may post-process the result.
+    `initializer` runs once in every worker process. Finished jobs are forgotten `retention` seconds
+    after they complete.
+    """
+    def __init__(self, state_dir, max_workers=2, retention=15 * 60, initializer=None):
+        self.state_dir = state_dir
+        self.max_workers = max_workers
+        self.retention = retention
+        self.initializer = initializer
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        os.makedirs(state_dir, exist_ok=True)
+
+    def _path(self, job_id, suffix):
+        return os.path.join(self.state_dir, f'{job_id}.{suffix}')
+
+    def _save(self, job):
+        _write_atomic(self._path(job.id, 'json'), json.dumps(job.record()).encode())
+
+    def submit(self, kind, owner, fn, *args, on_done=None, **kwargs):
+        """Queues `fn(*args, **kwargs)` and returns the new job's ID."""
+        job = Job(uuid.uuid4().hex, kind, owner)
+        self._save(job)
+        with self._lock:
+            self._purge()
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=self.initializer)
+            future = self._executor.submit(_run_job, fn, job.id, self.state_dir, args, kwargs)
+            self._futures[job.id] = future
+        future.add_done_callback(lambda future: self._finish(job, future, on_done))
+        return job.id
+
+    def _finish(self, job, future, on_done):
+        try:
+            result = future.result()
+            if on_done is not None:
+                result = on_done(job, result)
+            _write_atomic(self._path(job.id, 'result'), pickle.dumps(result))
+            job.status = DONE
+        except (CancelledError, JobCancelled):
+            job.status = CANCELLED
+        except Exception as e:
+            traceback.print_exc()
+            job.error, job.status = str(e), FAILED
+        job.finished_at = time.time()
+        self._save(job)
+        for suffix in ('progress', 'cancel'):
+            self._remove(job.id, suffix)
+        with self._lock:
+            self._futures.pop(job.id, None)
+
+    def get(self, job_id, owner):
+        """Returns the job, or None if it is unknown, expired or owned by someone else."""
+        if not (isinstance(job_id, str) and job_id.isalnum()):
+            return None
+        with self._lock:
+            self._purge()
+        record = _read_json(self._path(job_id, 'json'))
+        if record is None or record['owner'] != owner:
+            return None
+        job = Job.from_record(record)
+        if job.status == QUEUED and os.path.exists(self._path(job.id, 'progress')):
+            job.status = RUNNING
+        return job
+
+    def status(self, job):
+        progress = _read_json(self._path(job.id, 'progress')) if job.status in (QUEUED, RUNNING) else None
+        return job.to_dict(progress)
+
+    def result(self, job):
+        """The result of a finished job, as returned by its function or `on_done`."""
+        with open(self._path(job.id, 'result'), 'rb') as f:
+            return pickle.load(f)
+
+    def cancel(self, job):
+        """Cancels a queued job outright, or asks a running one to stop at its next progress call."""
+        if job.status in FINISHED:
+            return False
+        with self._lock:
+            future = self._futures.get(job.id)
+        if future is None or not future.cancel(): # Running, or accepted by another process
+            _write_atomic(self._path(job.id, 'cancel'), b'')
+        return True
+
+    def _remove(self, job_id, suffix):
+        try:
+            os.remove(self._path(job_id, suffix))
+        except OSError:
+            pass # Never written, or removed by another process
+
+    def _purge(self):
+        now = time.time()
+        for name in os.listdir(self.state_dir):
+            if not name.endswith('.json'):
+                continue
+            record = _read_json(os.path.join(self.state_dir, name))
+            if record is not None and record['finished_at'] is not None and now - record['finished_at'] > self.retention:
+                for suffix in ('result', 'progress', 'cancel', 'json'):
+                    self._remove(record['job_id'], suffix)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
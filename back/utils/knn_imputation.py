@@ -0,0 +1,125 @@
+import os
+import warnings
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+SEARCH_MODES = ('exact', 'approximate')
+MAX_QUERY_NEIGHBOURS = 64 # Most neighbours fetched per row from a pattern's shared tree
+
+
+class FastKNNImputer:
+    """KNN imputation that scales to millions of rows.
+
+    Only rows with missing values are searched. Query rows are grouped by missing pattern; for each
+    missing feature, the donors are the rows that have that feature and every feature the pattern
+    observes, indexed with a KD-tree over the observed features and queried in batches of
+    `batch_size` across `n_jobs` cores. Each missing value becomes the mean of that feature over the
+    `n_neighbors` nearest donors (all of them when there are fewer), like sklearn's `KNNImputer` with
+    uniform weights. `search='approximate'` returns (1 + `eps`)-approximate neighbours and caps each
+    tree at `max_donors` randomly sampled donors.
+
+    Values in rows with no observed feature, or with no donor at all, fall back to the column mean;
+    their count is left in `n_mean_fallback_`.
+    """
+    def __init__(self, n_neighbors=5, search='exact', batch_size=50_000, n_jobs=-1, eps=0.5, max_donors=200_000, random_state=0):
+        if search not in SEARCH_MODES:
+            raise ValueError(f"search must be one of {SEARCH_MODES}, got {search!r}")
+        self.n_neighbors = n_neighbors
+        self.search = search
+        self.batch_size = batch_size
+        self.n_jobs = n_jobs if n_jobs > 0 else (os.cpu_count() or 1)
+        self.eps = eps
+        self.max_donors = max_donors
+        self.random_state = random_state
+
+    def fit_transform(self, X):
+        """Returns a float copy of the 2-D array-like `X` with its NaNs imputed."""
+        X = np.array(X, dtype=float)
+        missing = np.isnan(X)
+        self.n_mean_fallback_ = 0
+        query_rows = np.flatnonzero(missing.any(axis=1))
+        if len(query_rows) == 0:
+            return X
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            col_means = np.nanmean(X, axis=0)
+        imputed = X.copy() # Donor values are read from X, so imputed values never act as donors
+
+        patterns, pattern_ids = np.unique(missing[query_rows], axis=0, return_inverse=True)
+        pattern_ids = pattern_ids.ravel()
+        for p, pattern in enumerate(patterns):
+            rows = query_rows[pattern_ids == p]
+            observed = ~pattern
+            targets = np.flatnonzero(pattern)
+            candidates = np.flatnonzero(~missing[:, observed].any(axis=1)) if observed.any() else np.array([], dtype=int)
+            target_present = ~missing[np.ix_(candidates, targets)]
+            fallback = ~target_present.any(axis=0) # No observed feature, or no row has both the target and them
+            if fallback.any():
+                imputed[np.ix_(rows, targets[fallback])] = col_means[targets[fallback]]
+                self.n_mean_fallback_ += len(rows) * int(fallback.sum())
+            if not fallback.all():
+                imputed[np.ix_(rows, targets[~fallback])] = self._neighbour_means(
+                    X, rows, observed, candidates, targets[~fallback], target_present[:, ~fallback])
+        return imputed
+
+    def _query(self, tree, X, rows, observed, k):
+        """Indices of the `k` nearest tree points to each row, queried in batches."""
+        eps = self.eps if self.search == 'approximate' else 0
+        idx = np.empty((len(rows), k), dtype=int)
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            _, found = tree.query(X[np.ix_(batch, observed)], k=k, eps=eps, workers=self.n_jobs)
+            idx[start:start + len(batch)] = found.reshape(len(batch), k)
+        return idx
+
+    def _neighbour_means(self, X, rows, observed, candidates, targets, target_present):
+        """Mean of each target over the nearest rows that have it, for every row of one pattern.
+
+        One tree over the candidates (rows with all observed features) serves the targets most
+        candidates have: extra neighbours are fetched and those missing the target skipped, and rows
+        still short of neighbours with a target are queried again with a doubled `k`, up to
+        MAX_QUERY_NEIGHBOURS. Sparser targets, and rows still short at that limit, are searched in a
+        tree over only that target's donors, so no query ever grows with the number of rows.
+        """
+        if self.search == 'approximate' and len(candidates) > self.max_donors:
+            rng = np.random.default_rng(self.random_state)
+            keep = np.sort(rng.choice(len(candidates), self.max_donors, replace=False))
+            enough = target_present[keep].sum(axis=0) >= np.minimum(self.n_neighbors, target_present.sum(axis=0))
+            if enough.all(): # Otherwise a rare target could lose its donors; search them all
+                candidates, target_present = candidates[keep], target_present[keep]
+        n_donors = target_present.sum(axis=0)
+        k_needed = np.minimum(self.n_neighbors, n_donors)
+        candidate_values = X[np.ix_(candidates, targets)]
+        means = np.full((len(rows), len(targets)), np.nan) # NaN until a row has its k neighbours with the target
+        k_max = min(len(candidates), max(MAX_QUERY_NEIGHBOURS, self.n_neighbors))
+        # Targets whose donors are dense enough that k_max neighbours usually include k of them
+        shared = np.flatnonzero(self.n_neighbors * len(candidates) <= k_max * n_donors)
+        if len(shared):
+            # Each tree serves one pattern, so a fast unbalanced build beats a slower, slightly better tree
+            tree = cKDTree(X[np.ix_(candidates, observed)], balanced_tree=False, compact_nodes=False)
+            pending = np.arange(len(rows))
+            # Start with enough extra neighbours that, at the sparsest target's rate, most rows find k with it
+            k_query = min(k_max, int(np.ceil(self.n_neighbors * len(candidates) / n_donors[shared].min())) + 3)
+            shared_present, shared_values = target_present[:, shared], candidate_values[:, shared]
+            while len(pending):
+                neighbours = self._query(tree, X, rows[pending], observed, k_query) # Positions in candidates
+                has_target = shared_present[neighbours] # (rows, k_query, targets)
+                chosen = has_target & (np.cumsum(has_target, axis=1) <= k_needed[shared])
+                counts = chosen.sum(axis=1)
+                found = counts >= k_needed[shared]
+                done = found.all(axis=1) | (k_query == k_max)
+                values = np.where(chosen[done], shared_values[neighbours[done]], 0.0)
+                block = values.sum(axis=1) / np.maximum(counts[done], 1)
+                block[~found[done]] = np.nan # Left for the per-target search below
+                means[np.ix_(pending[done], shared)] = block
+                pending = pending[~done]
+                k_query = min(k_max, 2 * k_query)
+        for t in np.flatnonzero(np.isnan(means).any(axis=0)):
+            short = np.flatnonzero(np.isnan(means[:, t]))
+            donors = np.flatnonzero(target_present[:, t])
+            tree = cKDTree(X[np.ix_(candidates[donors], observed)], balanced_tree=False, compact_nodes=False)
+            neighbours = self._query(tree, X, rows[short], observed, int(k_needed[t]))
+            means[short, t] = candidate_values[donors, t][neighbours].mean(axis=1)
+        return means
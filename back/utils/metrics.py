@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def resident_memory():
+    """Current resident set size of this process in bytes, or None where it cannot be read."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@contextmanager
+def stage_timer(stage, registry=None):
+    """Times a block and measures its change in resident memory.
+
+    Yields a dict that is filled with `stage`, `seconds` and `memory_delta_mb` when the block exits;
+    the duration is also observed in `registry` when given.
+    """
+    timing = {'stage': stage}
+    rss_before = resident_memory()
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing['seconds'] = round(time.perf_counter() - start, 6)
+        rss_after = resident_memory()
+        timing['memory_delta_mb'] = None if rss_before is None or rss_after is None else round((rss_after - rss_before) / 1024 ** 2, 3)
+        if registry is not None:
+            registry.observe('datacleaner_stage_duration_seconds', timing['seconds'], stage=stage)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+class MetricsRegistry:
+    """In-process latency histograms rendered in the Prometheus text format.
+
+    Metrics are per process: with several server processes, scrape each one.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._histograms = {} # name -> {labels tuple: [bucket counts..., sum, count]}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {}).get(key)
+            if series is None:
+                series = self._histograms[name][key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self, gauges=None):
+        """Prometheus text exposition (version 0.0.4) of every metric, plus `gauges` ({name: value})."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines += [f'# HELP {name} {self._help.get(name, name)}', f'# TYPE {name} histogram']
+                for key, values in sorted(series.items()):
+                    labels = dict(key)
+                    for bound, count in zip(self.buckets, values):
+                        lines.append(f'{name}_bucket{_format_labels({**labels, "le": bound})} {count}')
+                    lines.append(f'{name}_bucket{_format_labels({**labels, "le": "+Inf"})} {values[-1]}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {values[-2]}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {values[-1]}')
+        for name, value in sorted((gauges or {}).items()):
+            if value is not None:
+                lines += [f'# HELP {name} {self._help.get(name, name)}', f'# TYPE {name} gauge', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from .column_profile import numeric_block
+
+FILTERS = ('missing', 'outliers')
+
+
+def outlier_flags(df, profile, columns=None):
+    """Boolean (rows x columns) array marking values outside the profile's dataset-wide MAD bounds.
+
+    `columns` defaults to all numeric columns of the profile; returns (flags, columns).
+    """
+    columns = [col for col in (profile.numeric_cols if columns is None else columns) if col in profile.numeric.index]
+    bounds = profile.numeric.loc[columns, ['mad_lower', 'mad_upper']].to_numpy(dtype=float)
+    block = numeric_block(df, columns)
+    with np.errstate(invalid='ignore'):
+        flags = (block < bounds[:, 0]) | (block > bounds[:, 1])
+    return flags, columns
+
+
+def outlier_cells(df, profile):
+    """[[row label, column], ...] for every outlier value in `df`, judged by dataset-wide bounds."""
+    flags, columns = outlier_flags(df, profile)
+    rows, cols = np.nonzero(flags)
+    labels = df.index.tolist()
+    return [[labels[r], columns[c]] for r, c in zip(rows, cols)]
+
+
+def select_rows(df, profile, filter=None, column=None, sort=None, descending=False):
+    """Returns the row positions matching a preview query, in display order.
+
+    `filter` keeps rows with a missing value ('missing') or an outlier ('outliers'), in `column` when
+    given or in any column otherwise. `sort` orders by a column with missing values last.
+    """
+    for name in (column, sort):
+        if name is not None and name not in df.columns:
+            raise KeyError(name)
+    if filter is None:
+        positions = np.arange(len(df))
+    elif filter == 'missing':
+        mask = df[column].isna().to_numpy() if column is not None else df.isna().to_numpy().any(axis=1)
+        positions = np.flatnonzero(mask)
+    elif filter == 'outliers':
+        flags, _ = outlier_flags(df, profile, None if column is None else [column])
+        positions = np.flatnonzero(flags.any(axis=1))
+    else:
+        raise ValueError(f'Unknown filter: {filter}')
+
+    if sort is not None:
+        values = pd.Series(df[sort].to_numpy()[positions])
+        try:
+            order = values.sort_values(ascending=not descending, kind='stable', na_position='last').index
+        except TypeError: # Mixed types in an object column
+            order = values.astype(str).where(values.notna()).sort_values(ascending=not descending, kind='stable', na_position='last').index
+        positions = positions[order.to_numpy()]
+    return positions
@@ -0,0 +1,82 @@
+import gzip
+
+import numpy as np
+import orjson
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+
+try:
+    import brotli
+except ImportError: # Optional; gzip is used when it is not installed
+    brotli = None
+
+ORIENTS = ('records', 'columnar')
+DUMPS_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """Fallback for values orjson does not handle natively (object or non-contiguous arrays, pd.NA,
+    NaT, Timestamps)."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(payload):
+    """Encodes a response payload to JSON bytes. NaN and infinities become null; NumPy arrays and
+    scalars are encoded directly."""
+    return orjson.dumps(payload, default=_default, option=DUMPS_OPTIONS)
+
+
+def column_values(series):
+    """A column as an array orjson can encode as-is: numeric columns stay NumPy arrays (NaN encodes
+    as null), everything else becomes an object array with missing values as None."""
+    if is_numeric_dtype(series.dtype) and not is_bool_dtype(series.dtype) and isinstance(series.dtype, np.dtype):
+        return series.to_numpy()
+    missing = series.isna().to_numpy()
+    if is_datetime64_any_dtype(series.dtype):
+        values = series.astype(str).to_numpy(dtype=object)
+    else:
+        values = series.to_numpy(dtype=object)
+    if missing.any():
+        values = values.copy()
+        values[missing] = None
+    return values
+
+
+def frame_payload(df, orient='records'):
+    """Preview payload for a DataFrame slice, built from its column arrays without copying the frame.
+
+    `records` gives `{'columns', 'data': [{column: value}, ...], 'indices'}` like `to_dict`;
+    `columnar` gives `{'columns', 'arrays': [[...] per column], 'indices'}`, which is smaller for
+    wide previews.
+    """
+    columns = list(df.columns)
+    arrays = [column_values(df.iloc[:, i]) for i in range(len(columns))]
+    payload = {'columns': columns, 'indices': df.index.to_numpy()}
+    if orient == 'columnar':
+        payload['arrays'] = arrays
+    else:
+        payload['data'] = [dict(zip(columns, row)) for row in zip(*(values.tolist() for values in arrays))]
+    return payload
+
+
+def compress(body, accept_encoding, min_bytes=1024, level=6):
+    """Compresses a response body for the client's Accept-Encoding. Returns (body, encoding or None).
+
+    Brotli is preferred when the `brotli` package is installed; bodies under `min_bytes` are sent as-is.
+    """
+    if len(body) < min_bytes or not accept_encoding:
+        return body, None
+    accepted = {part.split(';')[0].strip().lower() for part in accept_encoding.split(',')}
+    if brotli is not None and 'br' in accepted:
+        return brotli.compress(body, quality=min(level, 11)), 'br'
+    if 'gzip' in accepted:
+        return gzip.compress(body, compresslevel=level), 'gzip'
+    return body, None
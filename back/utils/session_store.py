@@ -0,0 +1,278 @@
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .dataset_store import ARROW_STRING_TYPES, read_arrow
+
+DATA_ATTRS = ('original_data', 'cleaned_data')
+FILE_EXTENSIONS = {'arrow': 'arrow', 'parquet': 'parquet', 'pickle': 'pkl'}
+LOAD_ATTEMPTS = 3 # A load can race another process replacing the session's files
+STALE_FILE_SECONDS = 60 # Unreferenced files younger than this may belong to another process's write in progress
+
+
+class SessionNotFound(KeyError):
+    """Raised when a session ID is unknown or has expired."""
+
+
+class _Session:
+    def __init__(self, obj):
+        self.obj = obj
+        self.lock = threading.RLock()
+        self.last_access = time.time()
+        self.size = 0
+        self.spilled = False
+        self.loaded_version = 0.0
+        self.persisted = {} # attr -> (weak reference to the frame, format, file name) as last written or read
+        self.state_digest = None
+
+
+def frame_memory(df):
+    """Deep memory footprint of a DataFrame in bytes (0 for None)."""
+    return int(df.memory_usage(deep=True).sum()) if df is not None else 0
+
+
+class SessionStore:
+    """Thread-safe store of per-session cleaner objects keyed by session ID.
+
+    Each session has its own lock, so requests for different sessions run concurrently while
+    requests for the same session are serialized. Idle sessions past `ttl` seconds, and the least
+    recently used sessions once the in-memory DataFrames exceed `memory_budget` bytes, are spilled
+    to `spill_dir` (Parquet, with a pickle fallback for frames Arrow cannot represent) and reloaded
+    lazily on next access. Spilled sessions are deleted after `disk_ttl` seconds.
+
+    When a `dataset_store` is given and a session's `original_data` came from it (the object's
+    `dataset_id` is set), that frame is not written again: the store's Arrow file is hard-linked
+    into the session directory, so pruning the store cannot lose it, and re-read from a memory map.
+
+    Data files get a fresh name on every write and are renamed into place, then `state.pkl`, which
+    names them, is replaced atomically; readers therefore never see a half-written snapshot. Frames
+    that are still the objects last written or read are not written again, and an unchanged
+    snapshot is not rewritten at all. A load that fails, e.g. because another process just replaced
+    the files, is retried; if it keeps failing the session is reported as not found, but its files
+    are kept until `disk_ttl`.
+
+    With `write_through=True` every session is persisted when released and reloaded when another
+    process has written a newer snapshot, which lets multiple worker processes share sessions
+    through `spill_dir`.
+    """
+    def __init__(self, factory, spill_dir, memory_budget=1024 ** 3, ttl=30 * 60, disk_ttl=24 * 3600, write_through=False, dataset_store=None):
+        self.factory = factory
+        self.dataset_store = dataset_store
+        self.spill_dir = spill_dir
+        self.memory_budget = memory_budget
+        self.ttl = ttl
+        self.disk_ttl = disk_ttl
+        self.write_through = write_through
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(spill_dir, exist_ok=True)
+
+    def create(self):
+        """Creates an empty session and returns its ID."""
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[session_id] = _Session(self.factory())
+        return session_id
+
+    def delete(self, session_id):
+        if not self._is_valid_id(session_id):
+            return
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+
+    def __contains__(self, session_id):
+        with self._lock:
+            if session_id in self._sessions:
+                return True
+        return self._is_valid_id(session_id) and os.path.exists(self._meta_path(session_id))
+
+    @contextmanager
+    def acquire(self, session_id):
+        """Locks a session for the duration of the block and yields its cleaner object."""
+        session = self._get(session_id)
+        with session.lock:
+            if session.spilled or (self.write_through and self._disk_version(session_id) > session.loaded_version):
+                for attempt in range(LOAD_ATTEMPTS):
+                    try:
+                        self._load(session_id, session)
+                        break
+                    except (OSError, EOFError, ValueError, pickle.UnpicklingError) as e:
+                        if attempt == LOAD_ATTEMPTS - 1:
+                            raise SessionNotFound(session_id) from e
+                        time.sleep(0.05 * 2 ** attempt)
+            session.last_access = time.time()
+            try:
+                yield session.obj
+            finally:
+                session.size = sum(frame_memory(getattr(session.obj, attr, None)) for attr in DATA_ATTRS)
+                session.last_access = time.time()
+                if self.write_through:
+                    self._spill(session_id, session, drop=False)
+        self.evict()
+
+    def _get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+            if not (self._is_valid_id(session_id) and os.path.exists(self._meta_path(session_id))):
+                raise SessionNotFound(session_id)
+            session = _Session(None)
+            session.spilled = True
+            self._sessions[session_id] = session
+            return session
+
+    def evict(self):
+        """Spills expired and least recently used idle sessions until the memory budget is met."""
+        now = time.time()
+        with self._lock:
+            candidates = [(sid, s) for sid, s in self._sessions.items() if not s.spilled]
+            in_memory = sum(s.size for _, s in candidates)
+        for session_id, session in candidates:
+            expired = now - session.last_access > self.ttl
+            if not expired and in_memory <= self.memory_budget:
+                continue
+            if not session.lock.acquire(blocking=False):
+                continue
+            try:
+                if not session.spilled:
+                    self._spill(session_id, session, drop=True)
+                    in_memory -= session.size
+                    session.size = 0
+            finally:
+                session.lock.release()
+        self._purge_disk(now)
+
+    def _purge_disk(self, now):
+        for session_id in os.listdir(self.spill_dir):
+            meta_path = self._meta_path(session_id)
+            if os.path.exists(meta_path) and now - os.path.getmtime(meta_path) > self.disk_ttl:
+                with self._lock:
+                    session = self._sessions.get(session_id)
+                    if session is not None and not session.spilled:
+                        continue
+                    self._sessions.pop(session_id, None)
+                shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+
+    # --- Persistence ---
+    def _is_valid_id(self, session_id):
+        return isinstance(session_id, str) and session_id.isalnum()
+
+    def _session_dir(self, session_id):
+        return os.path.join(self.spill_dir, session_id)
+
+    def _meta_path(self, session_id):
+        return os.path.join(self._session_dir(session_id), 'state.pkl')
+
+    def _disk_version(self, session_id):
+        meta_path = self._meta_path(session_id)
+        return os.path.getmtime(meta_path) if os.path.exists(meta_path) else 0.0
+
+    def _write_frame(self, session_dir, attr, df, dataset_id):
+        """Writes one frame under a new file name and returns (format, file name)."""
+        base = f'{attr}.{uuid.uuid4().hex[:12]}'
+        if (attr == 'original_data' and self.dataset_store and self.dataset_store.has(dataset_id)
+                and self.dataset_store.link(dataset_id, os.path.join(session_dir, f'{base}.arrow'))):
+            return 'arrow', f'{base}.arrow'
+        for fmt, write in (('parquet', df.to_parquet), ('pickle', df.to_pickle)):
+            name = f'{base}.{FILE_EXTENSIONS[fmt]}'
+            tmp_path = os.path.join(session_dir, f'{name}.tmp')
+            try:
+                write(tmp_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                if fmt == 'pickle':
+                    raise
+                continue
+            os.replace(tmp_path, os.path.join(session_dir, name))
+            return fmt, name
+
+    def _spill(self, session_id, session, drop):
+        session_dir = self._session_dir(session_id)
+        os.makedirs(session_dir, exist_ok=True)
+        state = dict(session.obj.__getstate__() if hasattr(session.obj, '__getstate__') else vars(session.obj))
+        formats, files, persisted = {}, {}, {}
+        for attr in DATA_ATTRS:
+            df = state.pop(attr, None)
+            if df is None:
+                continue
+            previous = session.persisted.get(attr)
+            if previous is not None and previous[0]() is df:
+                fmt, name = previous[1:]
+            else:
+                fmt, name = self._write_frame(session_dir, attr, df, state.get('dataset_id'))
+            formats[attr], files[attr] = fmt, name
+            persisted[attr] = (weakref.ref(df), fmt, name)
+        blob = pickle.dumps({'state': state, 'formats': formats, 'files': files})
+        digest = hashlib.sha256(blob).digest()
+        meta_path = self._meta_path(session_id)
+        if digest != session.state_digest or not os.path.exists(meta_path):
+            tmp_path = f'{meta_path}.{uuid.uuid4().hex[:12]}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, meta_path)
+            self._remove_stale_files(session_dir, set(files.values()), {entry[2] for entry in session.persisted.values()})
+            session.state_digest = digest
+        elif drop:
+            os.utime(meta_path) # The disk TTL counts from when the session was last used
+        session.persisted = persisted
+        session.loaded_version = self._disk_version(session_id)
+        if drop:
+            session.obj = None
+            session.spilled = True
+
+    def _remove_stale_files(self, session_dir, referenced, own):
+        """Removes data files the new snapshot no longer names: the ones this process wrote before, and
+        any other old enough that no write in progress can still need it."""
+        now = time.time()
+        for name in os.listdir(session_dir):
+            if name == 'state.pkl' or name in referenced or name.endswith('.tmp'):
+                continue
+            path = os.path.join(session_dir, name)
+            try:
+                if name in own or now - os.stat(path).st_ctime > STALE_FILE_SECONDS:
+                    os.remove(path)
+            except OSError:
+                pass # Already removed by another process
+
+    def _load(self, session_id, session):
+        session_dir = self._session_dir(session_id)
+        with open(self._meta_path(session_id), 'rb') as f:
+            blob = f.read()
+        meta = pickle.loads(blob)
+        obj = self.factory()
+        obj.__dict__.update(meta['state'])
+        persisted = {}
+        for attr, fmt in meta['formats'].items():
+            # Snapshots written before file names were versioned use fixed names
+            name = meta.get('files', {}).get(attr, f'{attr}.{FILE_EXTENSIONS.get(fmt, fmt)}')
+            path = os.path.join(session_dir, name)
+            if fmt == 'arrow':
+                df = read_arrow(path)
+            elif fmt == 'dataset': # Spilled before datasets were linked; the store may have pruned it
+                df = self.dataset_store.read(obj.dataset_id)
+            elif fmt == 'parquet':
+                df = pq.read_table(path).to_pandas(types_mapper=ARROW_STRING_TYPES)
+            else:
+                df = pd.read_pickle(path)
+            setattr(obj, attr, df)
+            if fmt != 'dataset':
+                persisted[attr] = (weakref.ref(df), fmt, name)
+        session.obj = obj
+        session.spilled = False
+        session.persisted = persisted
+        session.state_digest = hashlib.sha256(blob).digest()
+        session.loaded_version = self._disk_version(session_id)
@@ -0,0 +1,56 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .session_store import frame_memory
+
+
+def fingerprint_frame(df, row_hashes):
+    """Content fingerprint of a DataFrame from its row hashes, column names and dtypes."""
+    h = hashlib.sha256(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    h.update(row_hashes.tobytes())
+    return h.hexdigest()
+
+
+def chain_key(parent_key, stage, options):
+    """Key of a stage's output: its input's key plus the stage name and options."""
+    return hashlib.sha256(f'{parent_key}|{stage}|{options!r}'.encode()).hexdigest()
+
+
+class StageCache:
+    """Bounded LRU cache of pipeline stage outputs, sized by the DataFrames it holds.
+
+    Entries are `(df, messages, extra)` tuples; DataFrames stored here are shared with callers and
+    must be treated as read-only.
+    """
+    def __init__(self, max_bytes=512 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        size = frame_memory(entry[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._sizes[key] = size
+            while sum(self._sizes.values()) > self.max_bytes:
+                oldest, _ = self._entries.popitem(last=False)
+                del self._sizes[oldest]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
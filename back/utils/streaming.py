@@ -0,0 +1,325 @@
+import os
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .column_profile import hash_rows, mad_bounds
+from .dedup import RowHashSet, normalize_for_matching
+from .type_inference import missing_token_variants, normalize_missing_values
+
+DEFAULT_CHUNKSIZE = 100_000
+DEFAULT_SAMPLE_SIZE = 100_000
+
+
+class StreamingDataCleaner:
+    """Two-pass, chunked counterpart of AdvancedDataCleaner for CSV files larger than RAM.
+
+    The first pass (`load_data`) collects running moments, null counts, a uniform row sample
+    used as the median/quantile/MAD sketch, and the duplicate-row hashes. The second pass
+    (`run_cleaning`) imputes, caps, rounds and de-duplicates chunk by chunk and appends the
+    result to the output CSV, so peak memory follows the chunk and sample sizes, not the file.
+    """
+    def __init__(self, chunksize=DEFAULT_CHUNKSIZE, sample_size=DEFAULT_SAMPLE_SIZE, numeric_threshold=0.6, random_state=0):
+        self.chunksize = chunksize
+        self.sample_size = sample_size
+        self.numeric_threshold = numeric_threshold
+        self.rng = np.random.default_rng(random_state)
+        self.file_path = None
+        self.columns = []
+        self.numeric_cols = []
+        self.int_cols = []
+        self.column_stats = {}
+        self.cleaning_log = []
+        self.stats_before = {}
+        self.stats_after = {}
+        self.outliers_info = {}
+        self.missing_info = {}
+        self.missing_tokens = {"", "na", "n/a", "nan", "null", "none", "unknown", "error"}
+        self._sample = None
+        self._sample_keys = None
+        self._raw_columns = []
+
+    def log_action(self, action):
+        self.cleaning_log.append({'timestamp': datetime.now().isoformat(), 'action': action})
+
+    def _read_chunks(self, file_path, text_columns=()):
+        """Yields normalized chunks. `text_columns` are read as strings, so no chunk parses them as numbers."""
+        na_values = missing_token_variants(self.missing_tokens)
+        dtype = {raw: str for raw, col in zip(self._raw_columns, self.columns) if col in text_columns} or None
+        for chunk in pd.read_csv(file_path, encoding='utf-8', on_bad_lines='skip', chunksize=self.chunksize, na_values=na_values, dtype=dtype):
+            self._raw_columns = list(chunk.columns)
+            chunk.columns = [str(col).strip() for col in chunk.columns]
+            normalize_missing_values(chunk, self.missing_tokens)
+            yield chunk
+
+    def _to_numeric_block(self, chunk, columns):
+        """Converts the given columns to a 2-D float array, coercing unparseable text to NaN.
+
+        Also returns, per column, whether the coerced values came out with an integer dtype.
+        """
+        block = np.empty((len(chunk), len(columns)), dtype=float)
+        is_integer = np.zeros(len(columns), dtype=bool)
+        for j, col in enumerate(columns):
+            series = chunk[col]
+            if not pd.api.types.is_numeric_dtype(series):
+                series = pd.to_numeric(series, errors='coerce')
+            is_integer[j] = pd.api.types.is_integer_dtype(series)
+            block[:, j] = series.to_numpy(dtype=float, na_value=np.nan)
+        return block, is_integer
+
+    def _row_hashes(self, chunk, block):
+        """Row hashes that do not depend on the dtype a chunk happened to parse each column as.
+
+        Every column is hashed as its numeric value (NaN where a cell does not parse) plus the text of
+        the cells that do not parse, so 1 read as int64 in one chunk and as float64 in another (because
+        of a blank cell) hash alike.
+        """
+        parts = {}
+        for j, col in enumerate(self.columns):
+            series = chunk[col]
+            parts[2 * j] = block[:, j]
+            if pd.api.types.is_numeric_dtype(series):
+                parts[2 * j + 1] = np.full(len(chunk), None, dtype=object)
+            else:
+                parts[2 * j + 1] = series.astype(object).where(np.isnan(block[:, j])).to_numpy()
+        return hash_rows(pd.DataFrame(parts, index=chunk.index))
+
+    def _count_duplicates(self, numeric_mask):
+        """Counts duplicate rows again with the final column types, in an extra pass over the file.
+
+        Only needed when a column mixes numbers and text: its text then either becomes NaN (numeric
+        column) or its numbers keep their spelling (text column), which the first pass cannot know yet.
+        """
+        numeric_cols = [col for col, keep in zip(self.columns, numeric_mask) if keep]
+        text_cols = [col for col, keep in zip(self.columns, numeric_mask) if not keep]
+        hashes, duplicate_rows = RowHashSet(), 0
+        for chunk in self._read_chunks(self.file_path, text_cols):
+            block, _ = self._to_numeric_block(chunk, numeric_cols)
+            frame = pd.concat([chunk[text_cols], pd.DataFrame(block, index=chunk.index)], axis=1, ignore_index=True)
+            duplicate_rows += int((~hashes.first_seen(hash_rows(frame))).sum())
+        return duplicate_rows
+
+    def _update_sample(self, block):
+        """Keeps a uniform bottom-k row sample across chunks (the quantile/MAD sketch)."""
+        keys = self.rng.random(len(block))
+        if self._sample is None:
+            self._sample, self._sample_keys = block, keys
+        else:
+            self._sample = np.vstack([self._sample, block])
+            self._sample_keys = np.concatenate([self._sample_keys, keys])
+        if len(self._sample_keys) > self.sample_size:
+            keep = np.argpartition(self._sample_keys, self.sample_size)[:self.sample_size]
+            self._sample, self._sample_keys = self._sample[keep], self._sample_keys[keep]
+
+    def load_data(self, file_path):
+        """First pass: streams the CSV once and collects the statistics cleaning needs."""
+        try:
+            if file_path.rsplit('.', 1)[1].lower() != 'csv':
+                raise ValueError("Streaming mode only supports CSV files")
+            self.file_path = file_path
+            self.columns = []
+            self._raw_columns = []
+            self._sample = self._sample_keys = None
+            hashes = RowHashSet()
+            total_rows = duplicate_rows = 0
+            raw_nulls = numeric_counts = n = mean = m2 = None
+            native_numeric = is_integer = None
+
+            for chunk in self._read_chunks(file_path):
+                if not self.columns:
+                    self.columns = list(chunk.columns)
+                    k = len(self.columns)
+                    raw_nulls, numeric_counts = np.zeros(k, dtype=np.int64), np.zeros(k, dtype=np.int64)
+                    n, mean, m2 = np.zeros(k), np.zeros(k), np.zeros(k)
+                    native_numeric, is_integer = np.ones(k, dtype=bool), np.ones(k, dtype=bool)
+
+                total_rows += len(chunk)
+                raw_nulls += chunk.isnull().sum().to_numpy()
+                native_numeric &= np.array([pd.api.types.is_numeric_dtype(chunk[col]) for col in self.columns])
+
+                block, chunk_is_integer = self._to_numeric_block(chunk, self.columns)
+                duplicate_rows += int((~hashes.first_seen(self._row_hashes(chunk, block))).sum())
+                valid = ~np.isnan(block)
+                numeric_counts += valid.sum(axis=0)
+                is_integer &= chunk_is_integer
+
+                # Chan et al. parallel update of count, mean and sum of squared deviations.
+                chunk_n = valid.sum(axis=0).astype(float)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    chunk_mean = np.where(chunk_n > 0, np.nansum(block, axis=0) / np.maximum(chunk_n, 1), 0.0)
+                    chunk_m2 = np.nansum((block - chunk_mean) ** 2, axis=0)
+                    total_n = n + chunk_n
+                    delta = chunk_mean - mean
+                    mean = np.where(total_n > 0, mean + delta * chunk_n / np.maximum(total_n, 1), 0.0)
+                    m2 = m2 + chunk_m2 + delta ** 2 * n * chunk_n / np.maximum(total_n, 1)
+                n = total_n
+                self._update_sample(block)
+
+            if not self.columns:
+                raise ValueError("File contains no data")
+
+            non_null = total_rows - raw_nulls
+            numeric_mask = native_numeric | ((non_null > 0) & (numeric_counts >= self.numeric_threshold * np.maximum(non_null, 1)))
+            self.numeric_cols = [col for col, keep in zip(self.columns, numeric_mask) if keep]
+            self.int_cols = [col for col, keep, is_int in zip(self.columns, numeric_mask, is_integer) if keep and is_int]
+            self._sample = self._sample[:, numeric_mask]
+            if ((numeric_counts > 0) & (numeric_counts < non_null)).any(): # Some column mixes numbers and text
+                duplicate_rows = self._count_duplicates(numeric_mask)
+
+            null_counts = np.where(numeric_mask, total_rows - numeric_counts, raw_nulls)
+            self.column_stats = {
+                col: {'count': int(n[j]), 'mean': float(mean[j]), 'm2': float(m2[j])}
+                for j, col in enumerate(self.columns) if numeric_mask[j]
+            }
+            self.missing_info = {col: {'count': int(c)} for col, c in zip(self.columns, null_counts) if c > 0}
+            self.outliers_info = self._estimate_outliers_info(total_rows)
+            self.stats_before = self._build_stats(total_rows, int(null_counts.sum()), duplicate_rows)
+            self.log_action(f"Data profiled in chunks: {total_rows} rows, {len(self.columns)} columns")
+            return True
+        except Exception as e:
+            self.log_action(f"Error loading data: {str(e)}")
+            return False
+
+    def _build_stats(self, total_rows, missing_values, duplicate_rows):
+        size = total_rows * len(self.columns)
+        if total_rows == 0:
+            health_score = 0
+        else:
+            completeness = 1 - (missing_values / (size or 1))
+            uniqueness = 1 - (duplicate_rows / total_rows)
+            health_score = round((completeness * 0.7 + uniqueness * 0.3) * 100, 2)
+        return {
+            'total_rows': total_rows,
+            'total_columns': len(self.columns),
+            'missing_values': missing_values,
+            'duplicate_rows': duplicate_rows,
+            'health_score': health_score
+        }
+
+    def _estimate_outliers_info(self, total_rows):
+        """Scales MAD outlier counts found in the sample up to the whole file."""
+        sample = self._sample
+        if sample is None or len(sample) == 0:
+            return {}
+        lower, upper = mad_bounds(sample)
+        with np.errstate(invalid='ignore'):
+            counts = ((sample < lower) | (sample > upper)).sum(axis=0)
+        scale = total_rows / len(sample)
+        return {col: {'count': int(round(c * scale))} for col, c in zip(self.numeric_cols, counts) if c > 0}
+
+    def _fill_values(self, method):
+        if method == 'mean':
+            return np.array([self.column_stats[col]['mean'] if self.column_stats[col]['count'] else np.nan for col in self.numeric_cols])
+        if method in ('median', 'knn'):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                return np.nanmedian(self._sample, axis=0)
+        return None
+
+    def _capping_bounds(self, method, fill_values):
+        """Computes per-column clip bounds for the data as it looks after imputation."""
+        numeric_count = len(self.numeric_cols)
+        if method not in ('iqr', 'zscore', 'winsorization') or numeric_count == 0:
+            return None
+        sample = self._sample
+        if fill_values is not None:
+            sample = np.where(np.isnan(sample), fill_values, sample)
+        if method == 'iqr':
+            return mad_bounds(sample)
+        if method == 'winsorization':
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                return np.nanpercentile(sample, 5, axis=0), np.nanpercentile(sample, 95, axis=0)
+
+        n = np.array([self.column_stats[col]['count'] for col in self.numeric_cols], dtype=float)
+        mean = np.array([self.column_stats[col]['mean'] for col in self.numeric_cols])
+        m2 = np.array([self.column_stats[col]['m2'] for col in self.numeric_cols])
+        if fill_values is not None:
+            # Fold the imputed values into the running moments.
+            missing = self.stats_before['total_rows'] - n
+            fill = np.nan_to_num(fill_values)
+            total_n = n + missing
+            delta = fill - mean
+            with np.errstate(invalid='ignore', divide='ignore'):
+                m2 = m2 + delta ** 2 * n * missing / np.maximum(total_n, 1)
+                mean = np.where(total_n > 0, mean + delta * missing / np.maximum(total_n, 1), mean)
+            n = np.where(np.isnan(fill_values), n, total_n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(m2 / (n - 1))
+        std = np.where(n > 1, std, np.nan)
+        return mean - 3 * std, mean + 3 * std
+
+    def run_cleaning(self, options, output_path):
+        """Second pass: cleans the file chunk by chunk and appends the result to `output_path`."""
+        if self.file_path is None:
+            raise ValueError("No data profiled")
+        imputation_method = options.get('imputationMethod')
+        outlier_method = options.get('outlierMethod')
+        remove_duplicates = options.get('removeDuplicates')
+        dedup_columns = options.get('dedupColumns') or None
+        fuzzy = options.get('dedupMode') == 'fuzzy'
+
+        fill_values = self._fill_values(imputation_method)
+        bounds = self._capping_bounds(outlier_method, fill_values)
+        has_values = [self.column_stats[col]['count'] > 0 for col in self.numeric_cols]
+        hashes = RowHashSet()
+        keys = RowHashSet() if dedup_columns or fuzzy else hashes
+        final_rows = final_missing = final_duplicates = 0
+
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        text_cols = [col for col in self.columns if col not in self.numeric_cols]
+        for chunk in self._read_chunks(self.file_path, text_cols):
+            block, _ = self._to_numeric_block(chunk, self.numeric_cols)
+            if fill_values is not None:
+                block = np.where(np.isnan(block), fill_values, block)
+            if bounds is not None:
+                lower, upper = bounds
+                block = np.clip(block, np.where(np.isnan(lower), -np.inf, lower), np.where(np.isnan(upper), np.inf, upper))
+            for j, col in enumerate(self.numeric_cols):
+                if not has_values[j]:
+                    chunk[col] = block[:, j]
+                elif col in self.int_cols:
+                    chunk[col] = pd.Series(np.round(block[:, j]), index=chunk.index).astype('Int64')
+                else:
+                    chunk[col] = np.round(block[:, j], 1)
+
+            first = hashes.first_seen(hash_rows(chunk))
+            keep = first
+            if keys is not hashes: # Key-column or normalized matching; full-row duplicates still feed the stats
+                key_frame = normalize_for_matching(chunk, dedup_columns) if fuzzy else chunk[dedup_columns]
+                keep = keys.first_seen(hash_rows(key_frame))
+            if remove_duplicates:
+                chunk = chunk[keep]
+                first = first[keep]
+            final_duplicates += int((~first).sum())
+            final_rows += len(chunk)
+            final_missing += int(chunk.isnull().sum().sum())
+            chunk.to_csv(output_path, mode='a', header=not os.path.exists(output_path), index=False)
+
+        if imputation_method == 'knn':
+            self.log_action("KNN imputation is not available in streaming mode; applied median imputation.")
+        elif imputation_method in ('mean', 'median'):
+            self.log_action(f"Applied {imputation_method} imputation.")
+        if outlier_method == 'iqr':
+            self.log_action("Capped outliers using the robust MAD method.")
+        elif outlier_method == 'zscore':
+            self.log_action("Capped outliers using the Z-Score method.")
+        elif outlier_method == 'winsorization':
+            self.log_action("Applied Winsorization to outliers.")
+        if any([imputation_method != 'none', outlier_method != 'none']):
+            self.log_action("Rounded numerical columns.")
+        initial_duplicates = self.stats_before['duplicate_rows']
+        if remove_duplicates and fuzzy:
+            self.log_action("Near-duplicate matching is not available in streaming mode; matched normalized values exactly.")
+        if remove_duplicates and (initial_duplicates > 0 or keys is not hashes):
+            self.log_action(f"Removed {self.stats_before['total_rows'] - final_rows} duplicate rows.")
+
+        self.stats_after = self._build_stats(final_rows, final_missing, final_duplicates)
+        return {
+            'rows_removed': int(self.stats_before['total_rows'] - final_rows),
+            'missing_fixed': int(self.stats_before['missing_values'] - final_missing),
+            'duplicates_fixed': int(initial_duplicates)
+        }
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+SAMPLE_SIZE = 1000
+
+
+def missing_token_variants(tokens):
+    """Lower, upper and title-case spellings of the tokens, for the parsers' `na_values`."""
+    return sorted({variant for token in tokens for variant in (token, token.upper(), token.title())})
+
+
+def normalize_missing_values(df, tokens):
+    """Sets missing-value tokens in object columns to NaN, in place. Returns True if anything changed.
+
+    Tokens are matched on each column's factorized unique values rather than on every cell, which is
+    cheap because text columns usually repeat a few distinct strings.
+    """
+    changed = False
+    for col in df.select_dtypes(include=['object']).columns:
+        codes, uniques = pd.factorize(df[col])
+        if len(uniques) == 0:
+            continue
+        is_token = pd.Index(uniques).astype(str).str.strip().str.lower().isin(tokens)
+        if is_token.any():
+            mask = np.append(is_token, False)[codes] # code -1 (already NaN) maps to False
+            df.loc[mask, col] = np.nan
+            changed = True
+    return changed
+
+
+def coerce_numeric_columns(df, threshold=0.6, sample_size=SAMPLE_SIZE, random_state=0):
+    """Converts object columns to numeric in place when at least `threshold` of their values parse.
+
+    A random sample of each column's values first rules out obvious text columns (sampled ratio below
+    half the threshold); remaining candidates are parsed once per distinct value and mapped back
+    through the factorized codes. Returns True if any column was converted.
+    """
+    rng = np.random.default_rng(random_state)
+    changed = False
+    for col in df.select_dtypes(include=['object']).columns:
+        codes, uniques = pd.factorize(df[col])
+        present = codes >= 0
+        non_null_count = int(present.sum())
+        if non_null_count == 0:
+            continue
+        if non_null_count > sample_size:
+            sampled = np.unique(codes[present][rng.integers(0, non_null_count, sample_size)], return_counts=True)
+            parsed = pd.to_numeric(pd.Series(uniques[sampled[0]], dtype=object), errors='coerce').notna().to_numpy()
+            if sampled[1][parsed].sum() / sample_size < threshold / 2:
+                continue
+        numeric_uniques = pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce')
+        valid = numeric_uniques.notna().to_numpy()
+        counts = np.bincount(codes[present], minlength=len(uniques))
+        if counts[valid].sum() / non_null_count < threshold:
+            continue
+        if present.all() and valid.all():
+            values = numeric_uniques.to_numpy()[codes] # Keeps integer dtype, like pd.to_numeric would
+        else:
+            values = np.append(numeric_uniques.to_numpy(dtype=float, na_value=np.nan), np.nan)[codes]
+        df[col] = pd.Series(values, index=df.index)
+        changed = True
+    return changed
+
+
+def infer_schema(df):
+    """Records the column dtypes that normalization and coercion settled on."""
+    return {
+        'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
+        'numeric_columns': list(df.select_dtypes(include=np.number).columns)
+    }
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_integer_dtype, is_numeric_dtype, is_object_dtype
+
+MAX_POINTS = 500
+TOP_K = 10
+MAX_CATEGORIES = 30
+EXACT_COUNT_LIMIT = 1_000_000 # Categorical columns longer than this are counted on a sample
+COUNT_SAMPLE_SIZE = 200_000
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling. Returns the indices of the kept points.
+
+    The first and last points are always kept; every bucket in between keeps the point forming the
+    largest triangle with the previously kept point and the next bucket's average.
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    kept = np.empty(n_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[end:next_end].mean(), y[end:next_end].mean()
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = start + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+def minmax_indices(y, n_out):
+    """Min/max bucketing: keeps the lowest and highest point of each of at most `n_out // 2` buckets."""
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    size = -(-n // max(n_out // 2, 1))
+    buckets = -(-n // size) # Only buckets holding at least one point; the last may be partly padding
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    return np.unique(np.concatenate([offsets + np.nanargmin(padded, axis=1), offsets + np.nanargmax(padded, axis=1)]))
+
+
+def downsample_series(series, max_points=MAX_POINTS, method='lttb'):
+    """Returns (x, y, total) for a numeric column: index labels and values of a shape-preserving
+    downsample of all its non-null values, plus how many non-null values there were. Returns None
+    when the column has fewer than two distinct values."""
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    valid = ~np.isnan(values)
+    y = values[valid]
+    if len(y) == 0 or y.min() == y.max():
+        return None
+    if is_integer_dtype(series.index.dtype):
+        x = series.index.to_numpy()[valid]
+    else:
+        x = np.flatnonzero(valid)
+    if method == 'minmax':
+        kept = minmax_indices(y, max_points)
+    else:
+        kept = lttb_indices(x.astype(float), y, max_points)
+    return x[kept], y[kept], len(y)
+
+
+def top_k_counts(series, k=TOP_K, max_categories=MAX_CATEGORIES, exact_limit=EXACT_COUNT_LIMIT,
+                 sample_size=COUNT_SAMPLE_SIZE, random_state=0):
+    """Returns (names, counts, approximate) for the k most frequent values, or None when the column
+    has fewer than two or more than `max_categories` distinct values.
+
+    Columns longer than `exact_limit` are counted on a uniform sample and the counts scaled back up,
+    so cost stays flat as rows grow; `approximate` is True in that case.
+    """
+    values = series.to_numpy()
+    approximate = len(values) > exact_limit
+    if approximate:
+        values = values[np.random.default_rng(random_state).integers(0, len(values), sample_size)]
+    codes, uniques = pd.factorize(values)
+    if not 1 < len(uniques) <= max_categories:
+        return None
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    if approximate:
+        counts = np.rint(counts * (len(series) / sample_size)).astype(int)
+    order = np.argsort(-counts, kind='stable')[:k]
+    return [str(name) for name in uniques[order]], counts[order].tolist(), approximate
+
+
+def build_visualizations(df, max_points=MAX_POINTS, method='lttb', top_k=TOP_K, max_categories=MAX_CATEGORIES):
+    """Chart payloads for the frontend as compact columnar arrays.
+
+    Bar charts: `{'type': 'bar', 'column', 'names', 'values', 'approximate'}`.
+    Scatter charts: `{'type': 'scatter', 'column', 'x', 'y', 'total'}`, downsampled over the whole column.
+    """
+    viz_data = []
+    # Column lists come from the dtypes directly; `select_dtypes` would copy the whole frame
+    dtypes = df.dtypes
+    categorical_cols = [col for col, dtype in dtypes.items() if is_object_dtype(dtype) or isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype))]
+    numeric_cols = [col for col, dtype in dtypes.items() if is_numeric_dtype(dtype) and not is_bool_dtype(dtype)]
+    for col in categorical_cols:
+        counts = top_k_counts(df[col], k=top_k, max_categories=max_categories)
+        if counts is not None:
+            names, values, approximate = counts
+            viz_data.append({'type': 'bar', 'column': col, 'names': names, 'values': values, 'approximate': approximate})
+
+    for col in numeric_cols:
+        points = downsample_series(df[col], max_points=max_points, method=method)
+        if points is not None:
+            x, y, total = points
+            viz_data.append({'type': 'scatter', 'column': col, 'x': x.tolist(), 'y': y.tolist(), 'total': total})
+    return viz_data
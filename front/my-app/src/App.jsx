@@ -7,6 +7,22 @@ import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, Responsive
 // Configuration for the backend API URL
 const API_URL = 'http://localhost:5000';
 
+// Submits a background job and polls until it finishes; resolves with the result URL.
+const runJob = async (kind, sessionId, options) => {
+    const headers = { 'Content-Type': 'application/json', 'X-Session-ID': sessionId };
+    const submit = await fetch(`${API_URL}/jobs/${kind}`, { method: 'POST', headers, body: JSON.stringify(options || {}) });
+    const { job_id, error } = await submit.json();
+    if (!submit.ok) throw new Error(error || 'Job submission failed');
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 500));
+        const response = await fetch(`${API_URL}/jobs/${job_id}`, { headers });
+        const job = await response.json();
+        if (!response.ok) throw new Error(job.error || 'Job lookup failed');
+        if (job.status === 'done') return `${API_URL}/jobs/${job_id}/result?session_id=${sessionId}`;
+        if (job.status === 'failed' || job.status === 'cancelled') throw new Error(job.error || `Job ${job.status}`);
+    }
+};
+
 // --- CSS Styles ---
 const Style = () => (
   <style>{`
@@ -104,7 +120,7 @@ const UploadStep = ({ onUploadSuccess, setIsLoading, setError }) => {
     );
 };
 
-const ReportStep = ({ reportData, onClean, onReset }) => {
+const ReportStep = ({ reportData, onClean, onReset, onDownloadReport }) => {
     const [cleaningOptions, setCleaningOptions] = useState({ imputationMethod: 'none', outlierMethod: 'none', removeDuplicates: true });
     
     const { before, after, isLoading, outlierIndices } = reportData;
@@ -130,8 +146,11 @@ const ReportStep = ({ reportData, onClean, onReset }) => {
         if (!currentData || !currentData.visualizations) {
             return { barCharts: [], scatterCharts: [] };
         }
-        const barCharts = currentData.visualizations.filter(v => v.type === 'bar');
-        const scatterCharts = currentData.visualizations.filter(v => v.type === 'scatter');
+        // The API sends columnar arrays; recharts wants one object per point
+        const barCharts = currentData.visualizations.filter(v => v.type === 'bar')
+            .map(v => ({ ...v, data: v.names.map((name, i) => ({ name, value: v.values[i] })) }));
+        const scatterCharts = currentData.visualizations.filter(v => v.type === 'scatter')
+            .map(v => ({ ...v, data: v.x.map((x, i) => ({ x, y: v.y[i] })) }));
         return { barCharts, scatterCharts };
     }, [currentData]);
 
@@ -220,7 +239,7 @@ const ReportStep = ({ reportData, onClean, onReset }) => {
                 </ReportCard>
                 <div style={{display: 'flex', gap: '1rem', marginTop: '1rem'}}>
                     <ActionButton onClick={onReset} variant="secondary" style={{flex: 1}}><ArrowPathIcon style={{width: '1.25rem'}}/>New File</ActionButton>
-                    <ActionButton onClick={() => window.open(`${API_URL}/download/report`, '_blank')} variant="secondary" style={{flex: 1}}><DocumentTextIcon style={{width: '1.25rem'}}/>PDF Report</ActionButton>
+                    <ActionButton onClick={onDownloadReport} variant="secondary" style={{flex: 1}}><DocumentTextIcon style={{width: '1.25rem'}}/>PDF Report</ActionButton>
                 </div>
             </aside>
             <main className="report-main">
@@ -323,7 +342,8 @@ const DataCleanerApp = () => {
         setReportData(prev => ({ ...prev, isLoading: true }));
         setError('');
         try {
-            const response = await fetch(`${API_URL}/clean`, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(options) });
+            const resultUrl = await runJob('clean', reportData.before.session_id, options);
+            const response = await fetch(resultUrl);
             const data = await response.json();
             if (!response.ok) throw new Error(data.error || 'Cleaning failed');
             setReportData(prev => ({ ...prev, after: data, isLoading: false }));
@@ -333,9 +353,21 @@ const DataCleanerApp = () => {
         }
     };
 
+    const handleDownloadReport = async () => {
+        setIsLoading(true);
+        setError('');
+        try {
+            window.open(await runJob('report', reportData.before.session_id), '_blank');
+        } catch (err) {
+            setError(err.message);
+        } finally {
+            setIsLoading(false);
+        }
+    };
+
     const handleReset = async () => {
         try {
-            await fetch(`${API_URL}/reset`, { method: 'POST' });
+            await fetch(`${API_URL}/reset`, { method: 'POST', headers: { 'X-Session-ID': reportData.before?.session_id || '' } });
         } catch(e) { console.error("Reset failed", e) }
         setStep('upload');
         setReportData({ before: null, after: null, isLoading: false, outlierIndices: [] });
@@ -359,7 +391,7 @@ const DataCleanerApp = () => {
                     <main className="main-view">
                         <AnimatePresence mode="wait">
                             {step === 'upload' && <UploadStep key="upload" onUploadSuccess={handleUploadSuccess} setIsLoading={setIsLoading} setError={setError} />}
-                            {reportData.before && step === 'report' && <ReportStep key="report" reportData={reportData} onClean={handleClean} onReset={handleReset} />}
+                            {reportData.before && step === 'report' && <ReportStep key="report" reportData={reportData} onClean={handleClean} onReset={handleReset} onDownloadReport={handleDownloadReport} />}
                         </AnimatePresence>
                     </main>
                 </div>